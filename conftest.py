@@ -0,0 +1,21 @@
+import pytest
+
+
+@pytest.fixture(autouse=True, scope='session')
+def isolated_cache():
+    """Кэш тестов — в памяти, как у IsolatedCacheRunner в manage.py test."""
+    from django.test import override_settings
+    from yatube.test_runner import TEST_CACHES
+
+    with override_settings(CACHES=TEST_CACHES):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def inline_thumbnails(settings):
+    """Миниатюры в тестах готовятся в запросе, а не в фоновых потоках.
+
+    Иначе поток пишет в общую тестовую базу и во временный MEDIA_ROOT
+    уже после того, как тест их убрал.
+    """
+    settings.THUMBNAIL_WORKERS = 0
@@ -0,0 +1,140 @@
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+MISSING = object()
+
+_namespaces = {}
+_namespaces_lock = threading.Lock()
+
+
+class AppCache:
+    """Кэш с префиксом приложения, счётчиками и защитой от «стаи».
+
+    ``get_or_compute`` пересчитывает значение один раз: в процессе
+    остальные потоки ждут на блокировке, между процессами — на ключе,
+    занятом через атомарный ``add``.
+    """
+
+    lock_timeout = 30
+    poll_interval = 0.05
+
+    def __init__(self, namespace, alias='default'):
+        self.namespace = namespace
+        self.alias = alias
+        self.stats = Counter()
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    @property
+    def backend(self):
+        return caches[self.alias]
+
+    def key(self, key):
+        return f'{self.namespace}:{key}'
+
+    def get(self, key, default=None):
+        value = self.backend.get(self.key(key), MISSING)
+        if value is MISSING:
+            self.stats['misses'] += 1
+            return default
+        self.stats['hits'] += 1
+        return value
+
+    def get_many(self, keys):
+        found = self.backend.get_many([self.key(key) for key in keys])
+        self.stats['hits'] += len(found)
+        self.stats['misses'] += len(keys) - len(found)
+        prefix = len(self.namespace) + 1
+        return {key[prefix:]: value for key, value in found.items()}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        self.backend.set(self.key(key), value, timeout)
+
+    def set_many(self, mapping, timeout=DEFAULT_TIMEOUT):
+        self.backend.set_many(
+            {self.key(key): value for key, value in mapping.items()}, timeout
+        )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT):
+        return self.backend.add(self.key(key), value, timeout)
+
+    def delete(self, key):
+        self.backend.delete(self.key(key))
+
+    def delete_many(self, keys):
+        self.backend.delete_many([self.key(key) for key in keys])
+
+    def incr(self, key, delta=1):
+        return self.backend.incr(self.key(key), delta)
+
+    @contextmanager
+    def lock(self, key, timeout=None):
+        """Короткая блокировка между процессами на атомарном ``add``."""
+        timeout = timeout or self.lock_timeout
+        lock_key = self.key(f'lock:{key}')
+        deadline = time.monotonic() + timeout
+        acquired = self.backend.add(lock_key, 1, timeout)
+        while not acquired and time.monotonic() <= deadline:
+            time.sleep(self.poll_interval)
+            acquired = self.backend.add(lock_key, 1, timeout)
+        try:
+            yield
+        finally:
+            # Не дождавшись, работаем без блокировки, но чужой ключ
+            # не удаляем: он ещё защищает остальных ждущих.
+            if acquired:
+                self.backend.delete(lock_key)
+
+    def _local_lock(self, key):
+        with self._locks_lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def get_or_compute(self, key, compute, timeout=DEFAULT_TIMEOUT,
+                       should_cache=None):
+        value = self.get(key, MISSING)
+        if value is not MISSING:
+            return value
+        with self._local_lock(key):
+            value = self.backend.get(self.key(key), MISSING)
+            if value is not MISSING:
+                return value
+            lock_key = self.key(f'lock:{key}')
+            deadline = time.monotonic() + self.lock_timeout
+            acquired = self.backend.add(lock_key, 1, self.lock_timeout)
+            while not acquired and time.monotonic() <= deadline:
+                time.sleep(self.poll_interval)
+                value = self.backend.get(self.key(key), MISSING)
+                if value is not MISSING:
+                    return value
+                acquired = self.backend.add(lock_key, 1, self.lock_timeout)
+            try:
+                self.stats['computes'] += 1
+                value = compute()
+                if should_cache is None or should_cache(value):
+                    self.set(key, value, timeout)
+                return value
+            finally:
+                if acquired:
+                    self.backend.delete(lock_key)
+                with self._locks_lock:
+                    self._locks.pop(key, None)
+
+
+def namespaced(namespace, alias='default'):
+    with _namespaces_lock:
+        if namespace not in _namespaces:
+            _namespaces[namespace] = AppCache(namespace, alias)
+        return _namespaces[namespace]
+
+
+def all_stats():
+    with _namespaces_lock:
+        return {
+            name: dict(app_cache.stats)
+            for name, app_cache in _namespaces.items()
+        }
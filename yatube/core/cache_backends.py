@@ -0,0 +1,167 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+class SQLiteCache(BaseCache):
+    """Кэш в файле SQLite, общий для всех процессов на одном хосте.
+
+    В отличие от LocMemCache, воркеры gunicorn видят одни и те же ключи,
+    а incr/add атомарны между процессами.
+    """
+
+    cull_every = 100
+    params_limit = 999
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.path = location
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(
+            self.path, timeout=30, isolation_level=None
+        )
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS cache ('
+            'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)'
+        )
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        self._local.writes = 0
+        return connection
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _read(self, connection, key):
+        row = connection.execute(
+            'SELECT value, expires FROM cache WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1] is not None and row[1] <= time.time():
+            connection.execute('DELETE FROM cache WHERE key = ?', (key,))
+            return None
+        return row
+
+    def _write(self, connection, key, value, timeout):
+        connection.execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires) '
+            'VALUES (?, ?, ?)',
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+             self.get_backend_timeout(timeout)),
+        )
+        self._local.writes += 1
+        if self._local.writes % self.cull_every == 0:
+            self._cull(connection)
+
+    def _cull(self, connection):
+        connection.execute(
+            'DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?',
+            (time.time(),)
+        )
+        total = connection.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        if total > self._max_entries:
+            # NULL в SQLite сортируется первым: вечные ключи вроде
+            # поколения ленты вытесняются последними.
+            connection.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+                'ORDER BY expires IS NULL, expires LIMIT ?)',
+                (total // self._cull_frequency,)
+            )
+
+    def get(self, key, default=None, version=None):
+        row = self._read(self._connection(), self._key(key, version))
+        return default if row is None else pickle.loads(row[0])
+
+    def get_many(self, keys, version=None):
+        names = {self._key(key, version): key for key in keys}
+        connection = self._connection()
+        now = time.time()
+        found = {}
+        batch = list(names)
+        # Старые сборки SQLite ограничивают число параметров запроса 999.
+        for start in range(0, len(batch), self.params_limit):
+            chunk = batch[start:start + self.params_limit]
+            rows = connection.execute(
+                'SELECT key, value, expires FROM cache WHERE key IN '
+                f'({", ".join("?" * len(chunk))})',
+                chunk,
+            )
+            for key, value, expires in rows:
+                if expires is None or expires > now:
+                    found[names[key]] = pickle.loads(value)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._write(self._connection(), self._key(key, version),
+                    value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            if self._read(connection, key) is not None:
+                return False
+            self._write(connection, key, value, timeout)
+            return True
+        finally:
+            connection.execute('COMMIT')
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = self._read(connection, key)
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            connection.execute(
+                'UPDATE cache SET value = ? WHERE key = ?',
+                (pickle.dumps(value, pickle.HIGHEST_PROTOCOL), key)
+            )
+            return value
+        finally:
+            connection.execute('COMMIT')
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        cursor = self._connection().execute(
+            'UPDATE cache SET expires = ? WHERE key = ?',
+            (self.get_backend_timeout(timeout), self._key(key, version))
+        )
+        return cursor.rowcount > 0
+
+    def delete(self, key, version=None):
+        self._connection().execute(
+            'DELETE FROM cache WHERE key = ?', (self._key(key, version),)
+        )
+
+    def has_key(self, key, version=None):
+        return self._read(
+            self._connection(), self._key(key, version)
+        ) is not None
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # Соединение живёт весь срок потока: открывать файл на каждый
+        # запрос дороже, чем держать его.
+        pass
@@ -0,0 +1,16 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.template_warmup import time_context_processors
+
+
+class Command(BaseCommand):
+    help = 'Замеряет время контекстных процессоров на один запрос.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=1000)
+
+    def handle(self, *args, repeat, **options):
+        report = time_context_processors(repeat=max(repeat, 1))
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
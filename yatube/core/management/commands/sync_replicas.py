@@ -0,0 +1,44 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+def copy_sqlite(source_path, target_path):
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует базу SQLite primary в файлы реплик. С --lag повторяет '
+        'копирование раз в N секунд и так имитирует отставание реплик.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lag', type=float,
+            help='Копировать в цикле с такой задержкой, секунд.'
+        )
+
+    def handle(self, *args, lag=None, **options):
+        primary = connections.databases['default']
+        replicas = getattr(settings, 'DATABASE_REPLICAS', ())
+        if 'sqlite3' not in primary['ENGINE'] or not replicas:
+            raise CommandError('Нужны primary на SQLite и DATABASE_REPLICAS')
+        while True:
+            for alias in replicas:
+                copy_sqlite(
+                    primary['NAME'], connections.databases[alias]['NAME']
+                )
+            self.stdout.write(f'Реплики обновлены: {", ".join(replicas)}')
+            if lag is None:
+                return
+            time.sleep(lag)
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.template_warmup import warm_templates
+
+
+class Command(BaseCommand):
+    help = (
+        'Компилирует все шаблоны из templates/ и сообщает об ошибках. '
+        'В воркере то же делает yatube.wsgi при WARM_TEMPLATES_ON_BOOT.'
+    )
+
+    def handle(self, *args, **options):
+        compiled, errors = warm_templates()
+        for name, error in errors.items():
+            self.stderr.write(f'{name}: {error}')
+        if errors:
+            raise CommandError(f'Не компилируются шаблоны: {len(errors)}')
+        self.stdout.write(
+            self.style.SUCCESS(f'Скомпилировано шаблонов: {compiled}')
+        )
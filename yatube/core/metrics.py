@@ -0,0 +1,159 @@
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from .cache import all_stats
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+# Имя метрики Prometheus, её описание и ключ в статистике запроса.
+SERIES = (
+    ('yatube_request_latency_seconds', 'Полное время ответа', 'total'),
+    ('yatube_sql_seconds', 'Время SQL-запросов', 'sql_time'),
+    ('yatube_sql_queries', 'Число SQL-запросов', 'queries'),
+    ('yatube_template_seconds', 'Время рендера шаблонов', 'template_time'),
+)
+
+_local = threading.local()
+
+
+class RequestStats:
+    __slots__ = ('queries', 'sql_time', 'template_time', 'template_depth')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+
+
+def begin():
+    _local.stats = RequestStats()
+    return _local.stats
+
+
+def end():
+    _local.stats = None
+
+
+def current():
+    return getattr(_local, 'stats', None)
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    stats = current()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.sql_time += time.perf_counter() - start
+        stats.queries += 1
+
+
+@contextmanager
+def template_timer():
+    stats = current()
+    if stats is None:
+        yield
+        return
+    # Шаблон может рендерить другие (карточки в {% post_cards %}):
+    # время считается только у внешнего, иначе оно учлось бы дважды.
+    outer = not stats.template_depth
+    stats.template_depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.template_depth -= 1
+        if outer:
+            stats.template_time += time.perf_counter() - start
+
+
+class RollingSummary:
+    """Сумма и счётчик за всё время, квантили — по последним замерам."""
+
+    def __init__(self, window):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def quantiles(self):
+        ordered = sorted(self.samples)
+        if not ordered:
+            return [(q, 0.0) for q in QUANTILES]
+        last = len(ordered) - 1
+        return [(q, ordered[round(q * last)]) for q in QUANTILES]
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        window = getattr(settings, 'METRICS_WINDOW', 1024)
+        self.summaries = defaultdict(lambda: RollingSummary(window))
+
+    def record(self, view_name, stats, total):
+        values = {
+            'total': total,
+            'sql_time': stats.sql_time,
+            'queries': stats.queries,
+            'template_time': stats.template_time,
+        }
+        with self.lock:
+            for _, _, key in SERIES:
+                self.summaries[(key, view_name)].observe(values[key])
+
+    def render(self):
+        with self.lock:
+            snapshot = {
+                key: (summary.quantiles(), summary.total, summary.count)
+                for key, summary in self.summaries.items()
+            }
+        lines = []
+        for metric, help_text, key in SERIES:
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} summary')
+            for (series, view_name), values in sorted(snapshot.items()):
+                if series != key:
+                    continue
+                quantiles, total, count = values
+                label = view_name.replace('\\', '\\\\').replace('"', '\\"')
+                for quantile, value in quantiles:
+                    lines.append(
+                        f'{metric}{{view="{label}",quantile="{quantile}"}} '
+                        f'{value}'
+                    )
+                lines.append(f'{metric}_sum{{view="{label}"}} {total}')
+                lines.append(f'{metric}_count{{view="{label}"}} {count}')
+        lines.append('# HELP yatube_cache_events_total Обращения к кэшу')
+        lines.append('# TYPE yatube_cache_events_total counter')
+        for namespace, events in sorted(all_stats().items()):
+            for event, count in sorted(events.items()):
+                lines.append(
+                    f'yatube_cache_events_total{{namespace="{namespace}",'
+                    f'event="{event}"}} {count}'
+                )
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def server_timing(stats, total):
+    return ', '.join((
+        f'db;dur={stats.sql_time * 1000:.1f};desc="{stats.queries} queries"',
+        f'tpl;dur={stats.template_time * 1000:.1f}',
+        f'total;dur={total * 1000:.1f}',
+    ))
@@ -0,0 +1,32 @@
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+from . import metrics
+
+
+class MetricsMiddleware:
+    """Считает SQL, шаблоны и время ответа по имени view."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = metrics.begin()
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(metrics.sql_wrapper)
+                    )
+                response = self.get_response(request)
+        finally:
+            metrics.end()
+        total = time.perf_counter() - start
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else 'unresolved'
+        metrics.registry.record(view_name, stats, total)
+        response['Server-Timing'] = metrics.server_timing(stats, total)
+        return response
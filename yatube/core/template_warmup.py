@@ -0,0 +1,70 @@
+import os
+import statistics
+import time
+
+from django.template import engines
+from django.test import RequestFactory
+from django.utils.module_loading import import_string
+
+
+def template_names(directory):
+    """Имена всех шаблонов каталога относительно него самого."""
+    for root, _, files in os.walk(directory):
+        for filename in sorted(files):
+            path = os.path.join(root, filename)
+            yield os.path.relpath(path, directory).replace(os.sep, '/')
+
+
+def warm_templates():
+    """Компилирует шаблоны из DIRS каждого движка.
+
+    С кэширующим загрузчиком скомпилированные шаблоны остаются в памяти
+    процесса, и первый запрос не тратит время на разбор файлов.
+    Возвращает число шаблонов и ошибки по именам.
+    """
+    compiled, errors = 0, {}
+    for backend in engines.all():
+        for directory in getattr(backend, 'engine', backend).dirs:
+            for name in template_names(directory):
+                try:
+                    backend.get_template(name)
+                except Exception as exc:
+                    errors[name] = exc
+                else:
+                    compiled += 1
+    return compiled, errors
+
+
+def _request():
+    from django.contrib.auth.models import AnonymousUser
+
+    request = RequestFactory().get('/')
+    request.user = AnonymousUser()
+    return request
+
+
+def time_context_processors(repeat=1000):
+    """Время одного вызова каждого контекстного процессора, мкс.
+
+    Запрос один и тот же, поэтому замер показывает собственную цену
+    процессоров, которую платит каждый ответ с RequestContext.
+    """
+    request = _request()
+    results = {}
+    for backend in engines.all():
+        engine = getattr(backend, 'engine', None)
+        if engine is None:
+            continue
+        for path in engine.context_processors:
+            processor = import_string(path)
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                processor(request)
+                timings.append(time.perf_counter() - start)
+            results[path] = round(statistics.median(timings) * 10 ** 6, 3)
+    return {
+        'repeat': repeat,
+        'median_us': results,
+        'total_us': round(sum(results.values()), 3),
+    }
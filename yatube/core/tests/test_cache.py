@@ -0,0 +1,147 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase
+
+from core.cache import AppCache
+from core.cache_backends import SQLiteCache
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = SQLiteCache(
+            os.path.join(self.directory, 'cache.sqlite3'), {}
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_basic_operations(self):
+        """set/get/add/delete работают как у встроенных бэкендов."""
+        self.cache.set('key', {'value': 1})
+        self.assertEqual(self.cache.get('key'), {'value': 1})
+        self.assertFalse(self.cache.add('key', 'other'))
+        self.assertTrue(self.cache.add('new', 'value'))
+        self.cache.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+        self.assertEqual(self.cache.get('key', 'default'), 'default')
+
+    def test_expired_keys_are_missing(self):
+        """Просроченный ключ не возвращается и снова доступен для add."""
+        self.cache.set('key', 'value', timeout=0.01)
+        time.sleep(0.02)
+        self.assertIsNone(self.cache.get('key'))
+        self.assertTrue(self.cache.add('key', 'value'))
+
+    def test_shared_between_instances(self):
+        """Два экземпляра на одном файле видят одни и те же ключи."""
+        other = SQLiteCache(self.cache.path, {})
+        self.cache.set('shared', 'value')
+        self.assertEqual(other.get('shared'), 'value')
+
+    def test_incr_is_atomic(self):
+        """incr из многих потоков не теряет приращений."""
+        self.cache.set('counter', 0)
+
+        def bump():
+            for _ in range(20):
+                self.cache.incr('counter')
+
+        threads = [threading.Thread(target=bump) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.cache.get('counter'), 100)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_get_many_in_batches(self):
+        """get_many читает ключи пачкой и пропускает просроченные."""
+        self.cache.params_limit = 2
+        self.cache.set_many({'a': 1, 'b': 2, 'c': 3})
+        self.cache.set('old', 'value', timeout=0.01)
+        time.sleep(0.02)
+        self.assertEqual(
+            self.cache.get_many(['a', 'b', 'c', 'old', 'missing']),
+            {'a': 1, 'b': 2, 'c': 3},
+        )
+
+    def test_cull_keeps_keys_without_expiry(self):
+        """При переполнении первыми удаляются ключи со сроком жизни."""
+        cache = SQLiteCache(
+            self.cache.path, {'OPTIONS': {'MAX_ENTRIES': 10}}
+        )
+        cache.cull_every = 20
+        cache.set('generation', 1, timeout=None)
+        for number in range(19):
+            cache.set(f'key-{number}', number, timeout=60)
+        self.assertEqual(cache.get('generation'), 1)
+        self.assertIsNone(cache.get('key-0'))
+
+
+class AppCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.app_cache = AppCache('tests')
+        self.app_cache.backend.clear()
+
+    def test_namespace_and_counters(self):
+        """Ключи получают префикс, попадания и промахи считаются."""
+        self.app_cache.set('key', 'value')
+        self.assertEqual(self.app_cache.backend.get('tests:key'), 'value')
+        self.assertEqual(self.app_cache.get('key'), 'value')
+        self.assertIsNone(self.app_cache.get('missing'))
+        self.assertEqual(self.app_cache.stats['hits'], 1)
+        self.assertEqual(self.app_cache.stats['misses'], 1)
+
+    def test_single_flight(self):
+        """Параллельные промахи пересчитывают значение один раз."""
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.05)
+            return 'value'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                self.app_cache.get_or_compute('slow', compute)
+            ))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['value'] * 8)
+        self.assertEqual(len(calls), 1)
+
+    def test_lock_timeout_keeps_foreign_lock(self):
+        """Не дождавшись блокировки, чужой ключ блокировки не удаляем."""
+        backend = self.app_cache.backend
+        self.app_cache.lock_timeout = 0.01
+        for key in ('busy', 'value'):
+            backend.add(f'tests:lock:{key}', 'other', 60)
+        with self.app_cache.lock('busy'):
+            pass
+        self.assertEqual(self.app_cache.get_or_compute('value', lambda: 1), 1)
+        for key in ('busy', 'value'):
+            with self.subTest(key=key):
+                self.assertEqual(backend.get(f'tests:lock:{key}'), 'other')
+
+    def test_tests_use_memory_cache(self):
+        """Тесты не работают с общим файлом кэша dev-сервера."""
+        self.assertIsInstance(self.app_cache.backend, LocMemCache)
+
+    def test_should_cache_skips_values(self):
+        """Значения, отвергнутые should_cache, не сохраняются."""
+        self.app_cache.get_or_compute(
+            'skip', lambda: 'bad', should_cache=lambda value: False
+        )
+        self.assertIsNone(self.app_cache.get('skip'))
@@ -0,0 +1,86 @@
+import os
+import shutil
+import tempfile
+import threading
+
+from django.db import OperationalError, connections
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase, override_settings
+
+from yatube import settings_production
+
+WRITERS = 4
+READERS = 4
+OPERATIONS = 50
+
+
+@override_settings(SQLITE_PRAGMAS=settings_production.SQLITE_PRAGMAS)
+class SQLiteConcurrencyTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.settings_dict = dict(
+            connections.databases['default'],
+            NAME=os.path.join(self.directory, 'concurrency.sqlite3'),
+            OPTIONS=settings_production.DATABASES['default']['OPTIONS'],
+        )
+        connection = self.connect()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TABLE notes (id INTEGER PRIMARY KEY, text TEXT)'
+            )
+        connection.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def connect(self):
+        connection = DatabaseWrapper(self.settings_dict, alias='concurrency')
+        connection.ensure_connection()
+        return connection
+
+    def test_pragmas_applied_on_connect(self):
+        """Новое соединение получает WAL и busy_timeout."""
+        connection = self.connect()
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 20000)
+        connection.close()
+
+    def test_mixed_reads_and_writes_from_threads(self):
+        """Параллельные чтения и записи не падают с database is locked."""
+        errors = []
+
+        def work(write):
+            connection = self.connect()
+            try:
+                with connection.cursor() as cursor:
+                    for number in range(OPERATIONS):
+                        if write:
+                            cursor.execute(
+                                'INSERT INTO notes (text) VALUES (%s)',
+                                (f'note {number}',)
+                            )
+                        else:
+                            cursor.execute('SELECT COUNT(*) FROM notes')
+                            cursor.fetchone()
+            except OperationalError as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=work, args=(number < WRITERS,))
+            for number in range(WRITERS + READERS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        connection = self.connect()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM notes')
+            self.assertEqual(cursor.fetchone()[0], WRITERS * OPERATIONS)
+        connection.close()
@@ -0,0 +1,88 @@
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core import metrics
+
+User = get_user_model()
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_user(
+            username='metrics_admin', is_staff=True
+        )
+        cls.user = User.objects.create_user(username='metrics_user')
+
+    def setUp(self):
+        metrics.registry.reset()
+        cache.clear()
+        self.admin_client = Client()
+        self.admin_client.force_login(self.admin)
+
+    def test_server_timing_header(self):
+        """Ответ содержит Server-Timing с SQL, шаблонами и итогом."""
+        response = self.client.get(reverse('posts:index'))
+        timing = response['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn('queries"', timing)
+        self.assertIn('tpl;dur=', timing)
+        self.assertIn('total;dur=', timing)
+
+    def test_metrics_grouped_by_view_name(self):
+        """Метрики копятся по имени view в формате Prometheus."""
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        response = self.admin_client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        body = response.content.decode()
+        self.assertIn('# TYPE yatube_request_latency_seconds summary', body)
+        self.assertIn(
+            'yatube_request_latency_seconds_count{view="posts:index"} 2',
+            body
+        )
+        self.assertIn(
+            'yatube_sql_queries{view="posts:index",quantile="0.5"}', body
+        )
+
+    def test_metrics_only_for_staff(self):
+        """/metrics недоступна обычным пользователям."""
+        user_client = Client()
+        user_client.force_login(self.user)
+        for client in (self.client, user_client):
+            with self.subTest(client=client):
+                response = client.get(reverse('metrics'))
+                self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+    def test_rolling_summary_quantiles(self):
+        """Квантили считаются по окну последних замеров."""
+        summary = metrics.RollingSummary(window=100)
+        for value in range(1, 201):
+            summary.observe(value)
+        quantiles = dict(summary.quantiles())
+        self.assertGreater(quantiles[0.5], 100)
+        self.assertEqual(quantiles[0.99], 199)
+        self.assertEqual(summary.count, 200)
+        self.assertEqual(summary.total, sum(range(1, 201)))
+
+    def test_nested_templates_timed_once(self):
+        """Вложенный рендер не добавляет своё время ко времени внешнего."""
+        stats = metrics.begin()
+        try:
+            with mock.patch(
+                'core.metrics.time.perf_counter',
+                side_effect=[0.0, 1.0, 2.0, 3.0],
+            ):
+                with metrics.template_timer():
+                    with metrics.template_timer():
+                        pass
+        finally:
+            metrics.end()
+        self.assertEqual(stats.template_time, 2.0)
+        self.assertEqual(stats.template_depth, 0)
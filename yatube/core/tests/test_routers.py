@@ -0,0 +1,89 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from django.contrib.sessions.backends.cache import SessionStore
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.management.commands.sync_replicas import copy_sqlite
+from posts.models import Post
+from yatube.routers import (
+    PINNED_UNTIL_KEY, ReplicaPinningMiddleware, ReplicaRouter, replica_reads
+)
+
+
+@override_settings(DATABASE_REPLICAS=('replica',), REPLICA_PIN_SECONDS=60)
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def request(self, session):
+        request = RequestFactory().get('/')
+        request.session = session
+        return request
+
+    def test_feed_reads_go_to_replica(self):
+        """Чтения внутри ленты идут на реплику, остальные — на primary."""
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Post), 'replica')
+
+    def test_write_pins_request_and_session(self):
+        """После записи запрос и сессия читают только с primary."""
+        session = SessionStore()
+        seen = []
+
+        def writing_view(request):
+            with replica_reads():
+                seen.append(self.router.db_for_read(Post))
+                self.assertEqual(self.router.db_for_write(Post), 'default')
+                seen.append(self.router.db_for_read(Post))
+            return HttpResponse()
+
+        def reading_view(request):
+            with replica_reads():
+                seen.append(self.router.db_for_read(Post))
+            return HttpResponse()
+
+        ReplicaPinningMiddleware(writing_view)(self.request(session))
+        self.assertIn(PINNED_UNTIL_KEY, session)
+        ReplicaPinningMiddleware(reading_view)(self.request(session))
+        ReplicaPinningMiddleware(reading_view)(self.request(SessionStore()))
+        self.assertEqual(
+            seen, ['replica', 'default', 'default', 'replica']
+        )
+
+    def test_write_outside_request_does_not_pin_thread(self):
+        """Запись вне запроса не закрепляет поток за primary."""
+        self.router.db_for_write(Post)
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Post), 'replica')
+            self.router.db_for_write(Post)
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Post), 'replica')
+
+    def test_replicas_are_not_migrated(self):
+        """Схему реплик не трогают миграции."""
+        self.assertFalse(self.router.allow_migrate('replica', 'posts'))
+        self.assertIsNone(self.router.allow_migrate('default', 'posts'))
+
+
+class SyncReplicasTests(SimpleTestCase):
+    def test_copy_sqlite(self):
+        """sync_replicas копирует файл primary в файл реплики."""
+        directory = tempfile.mkdtemp()
+        try:
+            primary = os.path.join(directory, 'primary.sqlite3')
+            replica = os.path.join(directory, 'replica.sqlite3')
+            with sqlite3.connect(primary) as connection:
+                connection.execute('CREATE TABLE notes (text TEXT)')
+                connection.execute("INSERT INTO notes VALUES ('копия')")
+            copy_sqlite(primary, replica)
+            with sqlite3.connect(replica) as connection:
+                rows = connection.execute('SELECT text FROM notes').fetchall()
+            self.assertEqual(rows, [('копия',)])
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,39 @@
+import json
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
+from django.template import engines
+from django.template.loaders.filesystem import Loader
+from django.test import SimpleTestCase, override_settings
+
+from core.template_warmup import template_names
+from yatube import settings_production
+
+
+@override_settings(TEMPLATES=settings_production.TEMPLATES)
+class TemplateWarmupTests(SimpleTestCase):
+    def test_warm_templates_compiles_every_template(self):
+        """Команда компилирует все файлы из каталога templates/."""
+        out = StringIO()
+        call_command('warm_templates', stdout=out)
+        total = len(list(template_names(settings.TEMPLATES_DIR)))
+        self.assertIn(f'Скомпилировано шаблонов: {total}', out.getvalue())
+
+    def test_warm_templates_are_served_from_memory(self):
+        """После прогрева шаблоны не читаются с диска."""
+        call_command('warm_templates', stdout=StringIO())
+        with mock.patch.object(
+            Loader, 'get_contents', side_effect=AssertionError
+        ):
+            engines.all()[0].get_template('posts/index.html')
+
+    def test_context_processor_benchmark(self):
+        """Замер перечисляет все контекстные процессоры."""
+        out = StringIO()
+        call_command('benchmark_context_processors', repeat=10, stdout=out)
+        report = json.loads(out.getvalue())
+        processors = settings.TEMPLATES[0]['OPTIONS']['context_processors']
+        self.assertEqual(set(report['median_us']), set(processors))
+        self.assertGreaterEqual(report['total_us'], 0)
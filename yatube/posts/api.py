@@ -0,0 +1,175 @@
+from functools import wraps
+
+from django.core.files.storage import default_storage
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_safe
+
+from yatube.routers import use_replica
+
+from . import identity, timeline
+from .cache import get_timeline_version
+from .conditional import conditional, newest
+from .models import Comment, Group, Post, TimelineEntry
+from .paginators import paginate
+
+API_PER_PAGE = 20
+
+# Имя поля в ответе -> путь для values(); выборка идёт без моделей.
+POST_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'updated': 'updated',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+    'comments_count': 'comments_count',
+}
+TIMELINE_FIELDS = {
+    name: lookup if name == 'pub_date' else f'post__{lookup}'
+    for name, lookup in POST_FIELDS.items()
+}
+TIMELINE_FIELDS['id'] = 'post_id'
+COMMENT_FIELDS = {
+    'id': 'id',
+    'post': 'post_id',
+    'author': 'author__username',
+    'text': 'text',
+    'created': 'created',
+}
+GROUP_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'slug': 'slug',
+    'description': 'description',
+}
+
+
+def _project(queryset, fields):
+    return queryset.values(*fields.values())
+
+
+def _serialize(row, fields):
+    data = {name: row[lookup] for name, lookup in fields.items()}
+    if 'image' in data:
+        data['image'] = (
+            default_storage.url(data['image']) if data['image'] else None
+        )
+    return data
+
+
+def _link(request, cursor):
+    return f'{request.path}?cursor={cursor}' if cursor else None
+
+
+def _page(request, queryset, fields, **kwargs):
+    page = paginate(request, _project(queryset, fields), API_PER_PAGE,
+                    **kwargs)
+    return JsonResponse({
+        'results': [_serialize(row, fields) for row in page],
+        'next': _link(request, page.next_cursor),
+        'previous': _link(request, page.previous_cursor),
+    })
+
+
+def api_login_required(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse(
+                {'detail': 'Требуется авторизация'}, status=401
+            )
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def _group_id(slug):
+    group_id = identity.groups.pk(slug)
+    if group_id is None:
+        raise Http404
+    return group_id
+
+
+def _author_id(username):
+    author_id = identity.users.pk(username)
+    if author_id is None:
+        raise Http404
+    return author_id
+
+
+@require_safe
+@use_replica
+@conditional(lambda request: (newest(Post.objects),))
+def post_list(request):
+    return _page(request, Post.objects.all(), POST_FIELDS, pk_field='id')
+
+
+@require_safe
+@use_replica
+@conditional(lambda request, post_id: (
+    newest(Post.objects.filter(pk=post_id), 'updated'),
+))
+def post_detail(request, post_id):
+    row = _project(Post.objects.filter(pk=post_id), POST_FIELDS).first()
+    if row is None:
+        raise Http404
+    return JsonResponse(_serialize(row, POST_FIELDS))
+
+
+@require_safe
+@use_replica
+@conditional(lambda request, post_id: (
+    newest(Comment.objects.filter(post_id=post_id), 'created'),
+))
+def comment_list(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Http404
+    comments = Comment.objects.filter(post_id=post_id)
+    return _page(request, comments, COMMENT_FIELDS, key_field='created',
+                 pk_field='id')
+
+
+@require_safe
+@use_replica
+@conditional(lambda request: (None,))
+def group_list(request):
+    return _page(request, Group.objects.all(), GROUP_FIELDS, key_field='id',
+                 pk_field='id')
+
+
+@require_safe
+@use_replica
+@conditional(lambda request, slug: (
+    newest(Post.objects.filter(group__slug=slug)),
+))
+def group_posts(request, slug):
+    posts = Post.objects.filter(group_id=_group_id(slug))
+    return _page(request, posts, POST_FIELDS, pk_field='id')
+
+
+@require_safe
+@use_replica
+@conditional(lambda request, username: (
+    newest(Post.objects.filter(author__username=username)),
+))
+def profile_posts(request, username):
+    posts = Post.objects.filter(author_id=_author_id(username))
+    return _page(request, posts, POST_FIELDS, pk_field='id')
+
+
+def _timeline_state(request):
+    # Новые и изменённые посты меняют поколение кэша в ETag, подписки и
+    # отписки — версию ленты читателя; дата — одно чтение по индексу.
+    user_id = request.user.pk
+    return (
+        timeline.head(user_id), user_id, get_timeline_version(user_id)
+    )
+
+
+@require_safe
+@api_login_required
+@use_replica
+@conditional(_timeline_state)
+def follow_feed(request):
+    entries = TimelineEntry.objects.filter(user_id=request.user.pk)
+    return _page(request, entries, TIMELINE_FIELDS, pk_field='post_id')
@@ -0,0 +1,289 @@
+import json
+import random
+import statistics
+import time
+
+import django
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+
+from . import cards, counters, search, timeline
+from .models import Comment, Follow, Group, Post, User
+from .urls import app_name, urlpatterns
+
+BATCH_SIZE = 5000
+BENCH_USER_PREFIX = 'bench_user_'
+
+# Маршруты, которым нужен особый запрос: метод, данные, кто входит
+# на сайт, что подготовить перед каждым замером и какой код ответа
+# ждать (по умолчанию 200).
+REQUESTS = {
+    'post_edit': {'login': 'author'},
+    'add_comment': {
+        'method': 'post', 'data': {'text': 'Комментарий из бенчмарка'},
+        'status': 302,
+    },
+    'profile_follow': {
+        'setup': lambda reader, author: Follow.objects.filter(
+            user=reader, author=author
+        ).delete(),
+        'status': 302,
+    },
+    'profile_unfollow': {
+        'setup': lambda reader, author: Follow.objects.get_or_create(
+            user=reader, author=author
+        ),
+        'status': 302,
+    },
+}
+
+
+def _batched(rows, model):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            model.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def seed(users, groups, posts, comments, follows, seed=0,
+         index_search=True, log=None):
+    """Заполняет базу тестовыми данными заданного объёма.
+
+    Строки вставляются пачками через bulk_create, сигналы не срабатывают,
+    поэтому ленты, счётчики и поисковый индекс пересобираются в конце.
+    """
+    log = log or (lambda message: None)
+    rng = random.Random(seed)
+    start_user = User.objects.filter(
+        username__startswith=BENCH_USER_PREFIX
+    ).count()
+    with transaction.atomic():
+        log(f'Пользователи: {users}')
+        _batched((
+            User(username=f'{BENCH_USER_PREFIX}{start_user + number}')
+            for number in range(users)
+        ), User)
+        user_ids = list(User.objects.values_list('pk', flat=True))
+        log(f'Группы: {groups}')
+        start_group = Group.objects.count()
+        _batched((
+            Group(
+                title=f'Группа {start_group + number}',
+                slug=f'bench-group-{start_group + number}',
+                description='Группа для нагрузочных тестов',
+            )
+            for number in range(groups)
+        ), Group)
+        group_ids = list(Group.objects.values_list('pk', flat=True)) or [None]
+        log(f'Посты: {posts}')
+        _batched((
+            Post(
+                author_id=rng.choice(user_ids),
+                group_id=rng.choice(group_ids),
+                text=f'Пост номер {number} для нагрузочного теста ленты',
+            )
+            for number in range(posts)
+        ), Post)
+        # id постов берутся из таблицы: после удалений в них есть дыры.
+        post_ids = list(Post.objects.values_list('pk', flat=True))
+        log(f'Комментарии: {comments}')
+        if post_ids:
+            _batched((
+                Comment(
+                    post_id=rng.choice(post_ids),
+                    author_id=rng.choice(user_ids),
+                    text=f'Комментарий {number}',
+                )
+                for number in range(comments)
+            ), Comment)
+        log(f'Подписки: {follows}')
+        pairs = set()
+        limit = min(follows, len(user_ids) * (len(user_ids) - 1))
+        while len(pairs) < limit:
+            user_id, author_id = rng.sample(user_ids, 2)
+            pairs.add((user_id, author_id))
+        _batched((
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id, author_id in pairs
+        ), Follow)
+    log('Пересборка лент подписок')
+    timeline.rebuild()
+    log('Пересчёт счётчиков')
+    counters.recount()
+    if index_search:
+        log('Пересборка поискового индекса')
+        search.rebuild()
+
+
+def _route_kwargs(pattern, author, group, post):
+    values = {
+        'slug': group.slug if group else 'missing',
+        'username': author.username,
+        'post_id': post.pk if post else 0,
+    }
+    return {name: values[name] for name in pattern.pattern.converters}
+
+
+def bench_targets():
+    """Маршруты приложения с url и параметрами запроса для замера."""
+    post = Post.objects.select_related('author', 'group').first()
+    author = post.author if post else User.objects.first()
+    reader = User.objects.exclude(pk=getattr(author, 'pk', None)).first()
+    group = post.group if post and post.group else Group.objects.first()
+    for pattern in urlpatterns:
+        if not isinstance(pattern, URLPattern):
+            continue
+        url = reverse(
+            f'{app_name}:{pattern.name}',
+            kwargs=_route_kwargs(pattern, author, group, post),
+        )
+        options = REQUESTS.get(pattern.name, {})
+        setup = options.get('setup')
+        yield {
+            'name': f'{app_name}:{pattern.name}',
+            'url': url,
+            'method': options.get('method', 'get'),
+            'data': options.get('data'),
+            'user': author if options.get('login') == 'author' else reader,
+            'status': options.get('status', 200),
+            'setup': (lambda: setup(reader, author)) if setup else None,
+        }
+
+
+def _summary(timings, queries):
+    timings = sorted(timings)
+    return {
+        'runs': len(timings),
+        'min_ms': round(timings[0] * 1000, 3),
+        'median_ms': round(statistics.median(timings) * 1000, 3),
+        'p95_ms': round(
+            timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000,
+            3,
+        ),
+        'mean_ms': round(statistics.mean(timings) * 1000, 3),
+        'queries': queries,
+    }
+
+
+def _time_request(client, method, url, data):
+    with CaptureQueriesContext(connection) as captured:
+        start = time.perf_counter()
+        response = getattr(client, method)(url, data)
+        elapsed = time.perf_counter() - start
+    return elapsed, len(captured), response.status_code
+
+
+def run(repeat=5):
+    results = {}
+    for target in bench_targets():
+        client = Client()
+        if target['user'] is not None:
+            client.force_login(target['user'])
+        modes = {}
+        statuses = set()
+        for mode in ('cold', 'warm'):
+            timings, queries = [], 0
+            for _ in range(repeat):
+                if target['setup']:
+                    target['setup']()
+                if mode == 'cold':
+                    cache.clear()
+                elapsed, queries, status = _time_request(
+                    client, target['method'], target['url'], target['data']
+                )
+                timings.append(elapsed)
+                statuses.add(status)
+            modes[mode] = _summary(timings, queries)
+        results[target['name']] = {
+            'url': target['url'],
+            'status': sorted(statuses),
+            'expected_status': target['status'],
+            **modes,
+        }
+    return {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'django': django.get_version(),
+            'repeat': repeat,
+            'rows': {
+                'users': User.objects.count(),
+                'groups': Group.objects.count(),
+                'posts': Post.objects.count(),
+                'comments': Comment.objects.count(),
+                'follows': Follow.objects.count(),
+            },
+        },
+        'results': results,
+    }
+
+
+def _time_cards(render, posts):
+    with CaptureQueriesContext(connection) as captured:
+        start = time.perf_counter()
+        render(posts)
+        elapsed = time.perf_counter() - start
+    return elapsed, len(captured)
+
+
+def run_cards(count=10, repeat=5):
+    """Рендер страницы из ``count`` карточек без кэша, с холодным и тёплым.
+
+    Посты выбираются заранее, поэтому замер показывает только шаблоны
+    и обращения к кэшу.
+    """
+    posts = list(Post.objects.for_feed()[:count])
+    modes = {
+        'uncached': lambda items: [cards.render_card(post) for post in items],
+        'cold': cards.render_cards,
+        'warm': cards.render_cards,
+    }
+    results = {}
+    for mode, render in modes.items():
+        timings, queries = [], 0
+        for _ in range(repeat):
+            if mode == 'cold':
+                cache.clear()
+            elapsed, queries = _time_cards(render, posts)
+            timings.append(elapsed)
+        results[mode] = _summary(timings, queries)
+    return {'cards': len(posts), 'results': results}
+
+
+def unexpected_statuses(report):
+    """Замеры, где ответ не тот: их время — не время страницы."""
+    return [
+        (name, result['expected_status'], result['status'])
+        for name, result in report['results'].items()
+        if result['status'] != [result['expected_status']]
+    ]
+
+
+def regressions(current, baseline, tolerance):
+    """Замеры, чья медиана выросла больше чем на ``tolerance``."""
+    found = []
+    for name, modes in current['results'].items():
+        for mode in ('cold', 'warm'):
+            old = baseline['results'].get(name, {}).get(mode)
+            if not old:
+                continue
+            new = modes[mode]['median_ms']
+            if new > old['median_ms'] * (1 + tolerance):
+                found.append((name, mode, old['median_ms'], new))
+    return found
+
+
+def load(path):
+    with open(path, encoding='utf-8') as source:
+        return json.load(source)
+
+
+def dump(report, path):
+    with open(path, 'w', encoding='utf-8') as target:
+        json.dump(report, target, ensure_ascii=False, indent=2)
@@ -0,0 +1,73 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+
+from core.cache import namespaced
+
+FEED_GENERATION_KEY = 'feed:generation'
+
+posts_cache = namespaced('posts')
+
+
+def _get_counter(key):
+    value = posts_cache.get(key)
+    if value is None:
+        # Начинаем со времени, а не с единицы: если счётчик вытеснят
+        # из кэша, старые страницы не совпадут с новыми ключами.
+        posts_cache.add(key, time.time_ns(), None)
+        value = posts_cache.get(key)
+    return value
+
+
+def _bump_counter(key):
+    try:
+        posts_cache.incr(key)
+    except ValueError:
+        posts_cache.set(key, time.time_ns(), None)
+
+
+def get_generation():
+    return _get_counter(FEED_GENERATION_KEY)
+
+
+def bump_generation():
+    _bump_counter(FEED_GENERATION_KEY)
+
+
+def timeline_version_key(user_id):
+    return f'timeline:version:{user_id}'
+
+
+def get_timeline_version(user_id):
+    """Версия ленты подписок читателя: меняется при подписке и отписке."""
+    return _get_counter(timeline_version_key(user_id))
+
+
+def bump_timeline_version(user_id):
+    _bump_counter(timeline_version_key(user_id))
+
+
+def feed_cache_key(request):
+    viewer = request.user.pk if request.user.is_authenticated else 'anon'
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return (
+        f'feed:{get_generation()}:'
+        f'{request.resolver_match.view_name}:{viewer}:{path}'
+    )
+
+
+def feed_cache(view):
+    """Кэширует ответ ленты до следующего изменения постов."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'GET':
+            return view(request, *args, **kwargs)
+        return posts_cache.get_or_compute(
+            feed_cache_key(request),
+            lambda: view(request, *args, **kwargs),
+            settings.FEED_CACHE_TIMEOUT,
+            should_cache=lambda response: response.status_code == 200,
+        )
+    return wrapper
@@ -0,0 +1,48 @@
+import hashlib
+
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .cache import posts_cache
+
+CARD_TEMPLATE = 'includes/card_post.html'
+
+
+def card_key(post):
+    """Ключ карточки меняется вместе со всем, что в ней выводится.
+
+    Сбрасывать ничего не нужно: изменённый пост, новое имя автора или
+    готовые производные картинки дают новый ключ, а старый истекает сам.
+    """
+    version = '|'.join(map(str, (
+        post.updated.timestamp() if post.updated else '',
+        post.author.username,
+        post.author.get_full_name(),
+        post.group.slug if post.group_id else '',
+        post.image.name,
+        ','.join(str(item.pk) for item in post.derivatives.all()),
+    )))
+    return f'card:{post.pk}:{hashlib.md5(version.encode()).hexdigest()}'
+
+
+def render_card(post):
+    return render_to_string(CARD_TEMPLATE, {'post': post})
+
+
+def render_cards(posts):
+    """HTML карточек страницы: кэш читается одним get_many.
+
+    Заново рендерятся только карточки, которых нет в кэше.
+    """
+    posts = list(posts)
+    keys = [card_key(post) for post in posts]
+    cached = posts_cache.get_many(keys)
+    missing = {
+        key: render_card(post)
+        for key, post in zip(keys, posts) if key not in cached
+    }
+    if missing:
+        posts_cache.set_many(missing, settings.CARD_CACHE_TIMEOUT)
+        cached.update(missing)
+    return [mark_safe(cached[key]) for key in keys]
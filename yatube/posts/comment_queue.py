@@ -0,0 +1,242 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import Counter, namedtuple
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from . import counters, trending
+from .cache import bump_generation, posts_cache
+from .models import Comment, Post, User
+
+logger = logging.getLogger(__name__)
+
+# Сколько держать неподтверждённые комментарии для их авторов, если
+# поток записи упал и не успел снять отметку.
+PENDING_TIMEOUT = 60 * 10
+# Список отложенных комментариев правится под блокировкой в кэше;
+# правка занимает миллисекунды, дольше ждать незачем.
+PENDING_LOCK_TIMEOUT = 5
+# Неудачная пачка пишется по одному комментарию, а не прошедшие
+# возвращаются в очередь с растущей паузой: «database is locked»
+# обычно проходит за секунды.
+FLUSH_RETRIES = 5
+RETRY_DELAY = 0.5
+# Сколько при выходе ждать, пока поток допишет собранную пачку.
+SHUTDOWN_TIMEOUT = 30
+
+# Для шаблона хватает этих полей; модель Comment здесь не нужна:
+# присвоение ей автора роутер принял бы за запись и закрепил бы сессию
+# за primary.
+PendingComment = namedtuple('PendingComment', 'author text created')
+
+_queue = queue.Queue()
+_STOP = object()
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def pending_key(post_id, user_id):
+    return f'comments:pending:{post_id}:{user_id}'
+
+
+def _remember(comment):
+    key = pending_key(comment.post_id, comment.author_id)
+    # Запрос дописывает, а поток записи вычищает один и тот же список:
+    # без блокировки одна из записей потерялась бы.
+    with posts_cache.lock(key, PENDING_LOCK_TIMEOUT):
+        pending = posts_cache.get(key) or []
+        pending.append({
+            'token': comment.pending_token,
+            'text': comment.text,
+            'created': timezone.now(),
+        })
+        posts_cache.set(key, pending, PENDING_TIMEOUT)
+
+
+def _forget(comments):
+    tokens = {comment.pending_token for comment in comments}
+    keys = {
+        pending_key(comment.post_id, comment.author_id)
+        for comment in comments
+    }
+    for key in keys:
+        with posts_cache.lock(key, PENDING_LOCK_TIMEOUT):
+            left = [
+                entry for entry in posts_cache.get(key) or ()
+                if entry['token'] not in tokens
+            ]
+            if left:
+                posts_cache.set(key, left, PENDING_TIMEOUT)
+            else:
+                posts_cache.delete(key)
+
+
+def pending_for(post_id, user):
+    """Ещё не записанные комментарии автора: он видит их сразу."""
+    if not settings.COMMENT_QUEUE_BATCH or not user.is_authenticated:
+        return []
+    return [
+        PendingComment(user, entry['text'], entry['created'])
+        for entry in posts_cache.get(pending_key(post_id, user.pk)) or ()
+    ]
+
+
+def pending_count(post_id, user_id):
+    if not settings.COMMENT_QUEUE_BATCH or user_id is None:
+        return 0
+    return len(posts_cache.get(pending_key(post_id, user_id)) or ())
+
+
+def flush(comments):
+    """Пишет пачку одним bulk_create и поправляет то, что делают сигналы.
+
+    Комментарии к удалённым постам и от удалённых пользователей
+    отбрасываются: иначе внешний ключ сломал бы всю пачку.
+    """
+    post_ids = set(Post.objects.filter(
+        pk__in={comment.post_id for comment in comments}
+    ).values_list('pk', flat=True))
+    author_ids = set(User.objects.filter(
+        pk__in={comment.author_id for comment in comments}
+    ).values_list('pk', flat=True))
+    saved = [
+        comment for comment in comments
+        if comment.post_id in post_ids and comment.author_id in author_ids
+    ]
+    with transaction.atomic():
+        Comment.objects.bulk_create(saved)
+        totals = Counter(comment.post_id for comment in saved)
+        for post_id, total in totals.items():
+            counters.bump_comments(post_id, total)
+        trending.record_comments(saved)
+    _forget(comments)
+    if saved:
+        bump_generation()
+    return len(saved)
+
+
+def _write(batch):
+    """Пишет пачку, а если она не прошла — по одному; вернёт неудачные."""
+    try:
+        flush(batch)
+        return []
+    except Exception:
+        logger.exception('Не удалось записать %s комментариев', len(batch))
+    failed = []
+    for comment in batch:
+        try:
+            flush([comment])
+        except Exception:
+            failed.append(comment)
+    return failed
+
+
+def _retry(failed):
+    """Возвращает неудачные комментарии в очередь и ждёт перед повтором."""
+    attempts = 0
+    for comment in failed:
+        comment.flush_attempts = getattr(comment, 'flush_attempts', 0) + 1
+        if comment.flush_attempts > FLUSH_RETRIES:
+            logger.error(
+                'Комментарий %s к посту %s отброшен после %s попыток',
+                comment.pending_token, comment.post_id, FLUSH_RETRIES,
+            )
+            _forget([comment])
+            continue
+        attempts = max(attempts, comment.flush_attempts)
+        _queue.put(comment)
+    if attempts:
+        time.sleep(RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def _take_all():
+    batch = []
+    while True:
+        try:
+            comment = _queue.get_nowait()
+        except queue.Empty:
+            return batch
+        if comment is not _STOP:
+            batch.append(comment)
+
+
+def drain():
+    """Записывает всё, что осталось в очереди, в текущем потоке."""
+    batch = _take_all()
+    while batch:
+        _retry(_write(batch))
+        batch = _take_all()
+
+
+def _collect():
+    """Собирает пачку; второй элемент — пора ли потоку завершаться."""
+    comment = _queue.get()
+    if comment is _STOP:
+        return [], True
+    batch = [comment]
+    deadline = time.monotonic() + settings.COMMENT_FLUSH_INTERVAL
+    while len(batch) < settings.COMMENT_QUEUE_BATCH:
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+            break
+        try:
+            comment = _queue.get(timeout=timeout)
+        except queue.Empty:
+            break
+        if comment is _STOP:
+            return batch, True
+        batch.append(comment)
+    return batch, False
+
+
+def _run():
+    stop = False
+    while not stop:
+        batch, stop = _collect()
+        try:
+            if batch:
+                _retry(_write(batch))
+        finally:
+            close_old_connections()
+
+
+def _shutdown():
+    """При выходе даёт потоку дописать собранную пачку, затем остаток."""
+    if _flusher is not None and _flusher.is_alive():
+        _queue.put(_STOP)
+        _flusher.join(SHUTDOWN_TIMEOUT)
+    drain()
+
+
+def _start_flusher():
+    global _flusher
+    with _flusher_lock:
+        if _flusher is None:
+            atexit.register(_shutdown)
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(
+                target=_run, name='comment-flusher', daemon=True
+            )
+            _flusher.start()
+
+
+def enqueue(comment):
+    """Принимает комментарий к записи; 0 в COMMENT_QUEUE_BATCH — сразу.
+
+    Очередь живёт в процессе: запрос только кладёт в неё комментарий и
+    отметку в общий кэш, а поток пишет накопленное пачками, поэтому
+    блокировка записи SQLite берётся раз на пачку, а не на комментарий.
+    """
+    if not settings.COMMENT_QUEUE_BATCH:
+        comment.save()
+        return
+    comment.pending_token = uuid.uuid4().hex
+    _remember(comment)
+    _queue.put(comment)
+    _start_flusher()
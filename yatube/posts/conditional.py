@@ -0,0 +1,42 @@
+import hashlib
+
+from django.views.decorators.http import condition
+
+from .cache import get_generation
+
+
+def newest(queryset, field='pub_date'):
+    return queryset.order_by(f'-{field}').values_list(
+        field, flat=True
+    ).first()
+
+
+def latest(*stamps):
+    return max((stamp for stamp in stamps if stamp), default=None)
+
+
+def conditional(state):
+    """ETag и Last-Modified до вызова view: неизменная страница — 304.
+
+    ``state(request, **kwargs)`` возвращает дату последнего изменения
+    и, при необходимости, дополнительные части отпечатка. В ETag входит
+    и поколение кэша лент, которое меняется при правке и удалении постов,
+    групп и комментариев, поэтому отпечаток меняется не только от новых
+    записей.
+    """
+    def _state(request, **kwargs):
+        if not hasattr(request, '_conditional_state'):
+            request._conditional_state = state(request, **kwargs)
+        return request._conditional_state
+
+    def etag(request, **kwargs):
+        modified, *extra = _state(request, **kwargs)
+        raw = '|'.join(map(str, (
+            get_generation(), request.get_full_path(), modified, *extra
+        )))
+        return hashlib.md5(raw.encode()).hexdigest()
+
+    def last_modified(request, **kwargs):
+        return _state(request, **kwargs)[0]
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
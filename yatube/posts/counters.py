@@ -0,0 +1,142 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    Count, F, IntegerField, Max, OuterRef, Q, Subquery
+)
+from django.db.models.functions import Coalesce
+
+from .cache import posts_cache
+from .models import (
+    Comment, Follow, Group, GroupCounter, Post, User, UserCounter
+)
+
+GROUP_DIRECTORY_KEY = 'groups:directory'
+
+
+def bump_user(user_id, field, delta):
+    changes = {field: F(field) + delta}
+    if delta < 0:
+        UserCounter.objects.filter(
+            user_id=user_id, **{f'{field}__gte': -delta}
+        ).update(**changes)
+        return
+    if not UserCounter.objects.filter(user_id=user_id).update(**changes):
+        UserCounter.objects.get_or_create(user_id=user_id)
+        UserCounter.objects.filter(user_id=user_id).update(**changes)
+
+
+def bump_comments(post_id, delta):
+    posts = Post.objects.filter(pk=post_id)
+    if delta < 0:
+        posts = posts.filter(comments_count__gte=-delta)
+    posts.update(comments_count=F('comments_count') + delta)
+
+
+def add_group_post(group_id, pub_date, delta=1):
+    groups = GroupCounter.objects.filter(group_id=group_id)
+    changes = {'posts_count': F('posts_count') + delta}
+    if not groups.update(**changes):
+        GroupCounter.objects.get_or_create(group_id=group_id)
+        groups.update(**changes)
+    groups.filter(
+        Q(last_post__isnull=True) | Q(last_post__lt=pub_date)
+    ).update(last_post=pub_date)
+
+
+def add_posts(posts):
+    """Поправляет счётчики авторов и групп после bulk_create постов."""
+    posts = posts.order_by()
+    by_author = posts.values_list('author').annotate(total=Count('pk'))
+    for author_id, total in by_author:
+        bump_user(author_id, 'posts_count', total)
+    by_group = posts.exclude(group=None).values_list('group').annotate(
+        total=Count('pk'), newest=Max('pub_date')
+    )
+    for group_id, total, newest in by_group:
+        add_group_post(group_id, newest, total)
+    forget_group_directory()
+
+
+def remove_group_post(group_id):
+    GroupCounter.objects.filter(
+        group_id=group_id, posts_count__gte=1
+    ).update(posts_count=F('posts_count') - 1)
+    # Голова группы берётся по индексу post_group_feed_idx.
+    last_post = Post.objects.filter(group_id=group_id).order_by(
+        '-pub_date'
+    ).values_list('pub_date', flat=True).first()
+    GroupCounter.objects.filter(group_id=group_id).update(
+        last_post=last_post
+    )
+
+
+def group_directory():
+    """Группы со счётчиками постов; в кэше до изменения групп или постов."""
+    return posts_cache.get_or_compute(
+        GROUP_DIRECTORY_KEY,
+        lambda: list(Group.objects.order_by('title').values(
+            'title',
+            'slug',
+            'description',
+            posts_count=F('counters__posts_count'),
+            last_post=F('counters__last_post'),
+        )),
+        settings.FEED_CACHE_TIMEOUT,
+    )
+
+
+def forget_group_directory():
+    posts_cache.delete(GROUP_DIRECTORY_KEY)
+
+
+def _count_of(queryset, field):
+    subquery = queryset.filter(**{field: OuterRef('pk')}).order_by().values(
+        field
+    ).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(subquery, output_field=IntegerField()), 0)
+
+
+def recount():
+    """Пересчитывает все счётчики по исходным таблицам."""
+    with transaction.atomic():
+        UserCounter.objects.bulk_create(
+            (UserCounter(user_id=pk)
+             for pk in User.objects.values_list('pk', flat=True)),
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+        users = User.objects.annotate(
+            posts_total=_count_of(Post.objects, 'author'),
+            followers_total=_count_of(Follow.objects, 'author'),
+            following_total=_count_of(Follow.objects, 'user'),
+        )
+        UserCounter.objects.update(
+            posts_count=Subquery(
+                users.filter(pk=OuterRef('user')).values('posts_total')
+            ),
+            followers_count=Subquery(
+                users.filter(pk=OuterRef('user')).values('followers_total')
+            ),
+            following_count=Subquery(
+                users.filter(pk=OuterRef('user')).values('following_total')
+            ),
+        )
+        Post.objects.update(
+            comments_count=_count_of(Comment.objects, 'post')
+        )
+        GroupCounter.objects.bulk_create(
+            (GroupCounter(group_id=pk)
+             for pk in Group.objects.values_list('pk', flat=True)),
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+        group_posts = Post.objects.filter(
+            group=OuterRef('pk')
+        ).order_by().values('group')
+        GroupCounter.objects.update(
+            posts_count=_count_of(Post.objects, 'group'),
+            last_post=Subquery(
+                group_posts.annotate(last=Max('pub_date')).values('last')
+            ),
+        )
+    forget_group_directory()
@@ -1,6 +1,9 @@
 from django import forms
+from django.conf import settings
+from django.template.defaultfilters import filesizeformat
 
 from .models import Post, Comment
+from .uploads import store_image
 
 
 class PostForm(forms.ModelForm):
@@ -20,6 +23,52 @@ class PostForm(forms.ModelForm):
             'image': 'Картинка поста'
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Обрезанный файл сверх лимита нет смысла разбирать как картинку.
+        upload = self.files.get('image')
+        self.oversized = getattr(upload, 'oversized', False)
+        if self.oversized:
+            self.files = self.files.copy()
+            del self.files['image']
+
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        pillow_image = getattr(image, 'image', None)
+        if pillow_image is not None:
+            width, height = pillow_image.size
+            # Только JPEG декодируется сразу в уменьшенном масштабе.
+            if pillow_image.format == 'JPEG':
+                limit = settings.IMAGE_UPLOAD_MAX_PIXELS
+            else:
+                limit = settings.IMAGE_UPLOAD_MAX_DECODED_PIXELS
+            if width * height > limit:
+                raise forms.ValidationError(
+                    'Слишком большая картинка: %(width)s×%(height)s '
+                    'пикселей.',
+                    code='too_many_pixels',
+                    params={'width': width, 'height': height},
+                )
+        return image
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if self.oversized:
+            self.add_error('image', forms.ValidationError(
+                'Файл больше %(limit)s.',
+                code='too_large',
+                params={'limit': filesizeformat(
+                    settings.IMAGE_UPLOAD_MAX_BYTES
+                )},
+            ))
+        return cleaned_data
+
+    def save(self, commit=True):
+        image = self.cleaned_data.get('image')
+        if image and 'image' in self.changed_data:
+            self.instance.image = store_image(image)
+        return super().save(commit)
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,136 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import router
+from django.http import Http404
+
+from yatube.routers import PRIMARY
+
+from .cache import posts_cache
+from .models import Group, User
+
+# Отметка «такого нет»: несуществующие slug и имена тоже кэшируются,
+# чтобы перебор адресов не доходил до базы.
+NOT_FOUND = 'not-found'
+
+
+class LRU:
+    """Словарь ограниченного размера со сроком жизни записей."""
+
+    def __init__(self, size):
+        self.size = size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._data[key] = (time.monotonic() + timeout, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class IdentityCache:
+    """Объект по уникальному полю: LRU процесса, затем общий кэш, затем база.
+
+    В кэшах лежат только значения ``fields``, а не модели: каждый вызов
+    собирает новый экземпляр, и кэшированные на нём связи не утекают
+    в другие запросы. Общий кэш сбрасывают сигналы, а LRU других
+    процессов живёт не дольше IDENTITY_LOCAL_TIMEOUT.
+    """
+
+    def __init__(self, name, model, field, fields):
+        self.name = name
+        self.model = model
+        self.field = field
+        self.fields = fields
+        self.local = LRU(settings.IDENTITY_CACHE_SIZE)
+
+    def key(self, value):
+        digest = hashlib.md5(str(value).encode()).hexdigest()
+        return f'identity:{self.name}:{digest}'
+
+    def _load(self, value):
+        rows = self.model.objects.filter(**{self.field: value}).values_list(
+            *self.fields
+        )
+        row = rows.first()
+        if row is None and router.db_for_read(self.model) != PRIMARY:
+            # Реплика могла ещё не получить новое имя, а отрицательный
+            # ответ попадёт в общий кэш: подтверждаем его на primary.
+            row = rows.using(PRIMARY).first()
+        return row or NOT_FOUND
+
+    def _row(self, value):
+        key = self.key(value)
+        row = self.local.get(key)
+        if row is None:
+            row = posts_cache.get(key)
+            if row is None:
+                row = self._load(value)
+                posts_cache.set(key, row, (
+                    settings.IDENTITY_MISSING_TIMEOUT if row == NOT_FOUND
+                    else settings.IDENTITY_CACHE_TIMEOUT
+                ))
+            self.local.set(key, row, settings.IDENTITY_LOCAL_TIMEOUT)
+        return None if row == NOT_FOUND else row
+
+    def pk(self, value):
+        row = self._row(value)
+        return row[0] if row else None
+
+    def get(self, value):
+        row = self._row(value)
+        if row is None:
+            return None
+        return self.model.from_db(
+            router.db_for_read(self.model), self.fields, row
+        )
+
+    def get_or_404(self, value):
+        instance = self.get(value)
+        if instance is None:
+            raise Http404(
+                f'{self.model._meta.object_name} {value!r} не найден'
+            )
+        return instance
+
+    def forget(self, *values):
+        keys = [self.key(value) for value in values if value is not None]
+        for key in keys:
+            self.local.delete(key)
+        posts_cache.delete_many(keys)
+
+
+groups = IdentityCache(
+    'group', Group, 'slug', ('id', 'title', 'slug', 'description')
+)
+users = IdentityCache(
+    'user', User, 'username', ('id', 'username', 'first_name', 'last_name')
+)
@@ -0,0 +1,146 @@
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from .cache import bump_generation
+from .models import ImageDerivative, Post
+
+try:
+    # AVIF в Pillow появился только в 11.2; до этого — через плагин.
+    import pillow_avif  # noqa: F401
+except ImportError:
+    pass
+
+# Ширины карточки ленты: телефон, обычный экран и экран высокой
+# плотности. Высота — по пропорциям миниатюры 480x169.
+WIDTHS = (320, 480, 960)
+DEFAULT_WIDTH = 480
+ASPECT = 169 / 480
+
+# От лучшего сжатия к худшему: в <picture> браузер берёт первый
+# знакомый ему формат, а JPEG остаётся запасным для <img>.
+FORMATS = (
+    ('avif', 'AVIF', 'image/avif', {'quality': 50}),
+    ('webp', 'WEBP', 'image/webp', {'quality': 75, 'method': 4}),
+    ('jpeg', 'JPEG', 'image/jpeg', {'quality': 80, 'optimize': True,
+                                    'progressive': True}),
+)
+FALLBACK = 'jpeg'
+MIME_TYPES = {name: mime for name, _, mime, _ in FORMATS}
+
+
+def available_formats():
+    Image.init()
+    return tuple(
+        (name, pil_format, options)
+        for name, pil_format, _, options in FORMATS
+        if pil_format in Image.SAVE
+    )
+
+
+def _open(name, max_width):
+    with Post.image.field.storage.open(name, 'rb') as stream:
+        image = Image.open(stream)
+        # Для JPEG декодер сразу уменьшает картинку кратно 2: большие
+        # фотографии не разворачиваются в память целиком.
+        image.draft('RGB', (max_width, round(max_width * ASPECT)))
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def _widths(source_width):
+    widths = [width for width in WIDTHS if width <= source_width]
+    return widths or WIDTHS[:1]
+
+
+def _render(image, name, post_id):
+    stem = os.path.splitext(os.path.basename(name))[0]
+    formats = available_formats()
+    for width in _widths(image.width):
+        height = round(width * ASPECT)
+        resized = ImageOps.fit(image, (width, height), Image.LANCZOS)
+        for format_name, pil_format, options in formats:
+            buffer = BytesIO()
+            resized.save(buffer, pil_format, **options)
+            derivative = ImageDerivative(
+                post_id=post_id,
+                format=format_name,
+                width=width,
+                height=height,
+                size=buffer.tell(),
+            )
+            derivative.file.save(
+                f'{post_id}/{stem}-{width}.{format_name}',
+                ContentFile(buffer.getvalue()),
+                save=False,
+            )
+            yield derivative
+
+
+def clear_derivatives(post_id):
+    # Файлы удаляет сигнал post_delete.
+    ImageDerivative.objects.filter(post_id=post_id).delete()
+
+
+def render_derivatives(post_id, name):
+    """Файлы всех ширин и форматов; в базу ничего не пишет."""
+    return list(_render(_open(name, max(WIDTHS)), name, post_id))
+
+
+def save_derivatives(post_id, derivatives):
+    with transaction.atomic():
+        clear_derivatives(post_id)
+        ImageDerivative.objects.bulk_create(derivatives)
+    # bulk_create не шлёт сигналов: без нового поколения ленты в кэше
+    # и ETag поста так и остались бы с запасной разметкой sorl.
+    bump_generation()
+
+
+def build_derivatives(post_id):
+    """Заново строит производные картинки поста."""
+    name = Post.objects.filter(pk=post_id).values_list(
+        'image', flat=True
+    ).first()
+    if not name:
+        clear_derivatives(post_id)
+        return []
+    derivatives = render_derivatives(post_id, name)
+    save_derivatives(post_id, derivatives)
+    return derivatives
+
+
+def _srcset(derivatives):
+    return ', '.join(
+        f'{derivative.file.url} {derivative.width}w'
+        for derivative in derivatives
+    )
+
+
+def picture(derivatives):
+    """Источники для <picture>: srcset по форматам и запасной JPEG."""
+    by_format = {}
+    for derivative in derivatives:
+        by_format.setdefault(derivative.format, []).append(derivative)
+    fallback = by_format.pop(FALLBACK, None)
+    if not fallback:
+        return None
+    return {
+        'sources': [
+            {'type': mime, 'srcset': _srcset(by_format[name])}
+            for name, mime in MIME_TYPES.items() if name in by_format
+        ],
+        'srcset': _srcset(fallback),
+        'img': next(
+            (item for item in fallback if item.width == DEFAULT_WIDTH),
+            fallback[-1]
+        ),
+    }
@@ -0,0 +1,28 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет рендер страницы карточек постов без кэша фрагментов, '
+        'с холодным и с тёплым кэшем.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument(
+            '--allow-writes', action='store_true',
+            help='Подтверждение: холодный замер очищает кэш.'
+        )
+
+    def handle(self, *args, count, repeat, allow_writes, **options):
+        if not allow_writes:
+            raise CommandError(
+                'Замер очищает кэш. Запустите его с --allow-writes.'
+            )
+        report = benchmark.run_cards(count=count, repeat=max(repeat, 1))
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
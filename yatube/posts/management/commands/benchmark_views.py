@@ -0,0 +1,60 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет все URL приложения posts с холодным и тёплым кэшем '
+        'и сравнивает результат с прошлым прогоном.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--output', help='Куда сохранить JSON-отчёт.')
+        parser.add_argument('--baseline', help='JSON прошлого прогона.')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Допустимый рост медианы, доля (0.2 = 20%%).'
+        )
+        parser.add_argument(
+            '--allow-writes', action='store_true',
+            help=(
+                'Подтверждение: замер пишет в базу (комментарии, правки, '
+                'подписки) и очищает кэш. Запускайте на отдельной базе.'
+            ),
+        )
+
+    def handle(self, *args, repeat, output, baseline, tolerance,
+               allow_writes, **options):
+        if not allow_writes:
+            raise CommandError(
+                'Бенчмарк пишет в базу и очищает кэш. Запустите его на '
+                'отдельной базе с --allow-writes.'
+            )
+        report = benchmark.run(repeat=max(repeat, 1))
+        if output:
+            benchmark.dump(report, output)
+        else:
+            self.stdout.write(
+                json.dumps(report, ensure_ascii=False, indent=2)
+            )
+        unexpected = benchmark.unexpected_statuses(report)
+        for name, expected, statuses in unexpected:
+            self.stderr.write(
+                f'{name}: ответ {statuses}, ожидался {expected}'
+            )
+        if unexpected:
+            raise CommandError(f'Неожиданные ответы: {len(unexpected)}')
+        if not baseline:
+            return
+        found = benchmark.regressions(
+            report, benchmark.load(baseline), tolerance
+        )
+        for name, mode, old, new in found:
+            self.stderr.write(f'{name} [{mode}]: {old} мс -> {new} мс')
+        if found:
+            raise CommandError(f'Замедлились замеры: {len(found)}')
+        self.stdout.write(self.style.SUCCESS('Регрессий нет'))
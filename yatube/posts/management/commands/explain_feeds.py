@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+from posts.models import Comment, Group, Post, User
+from posts.paginators import COMMENTS_PER_PAGE, POSTS_PER_PAGE, CursorPaginator
+
+
+def first_page(queryset, per_page=POSTS_PER_PAGE, **kwargs):
+    paginator = CursorPaginator(queryset, per_page, **kwargs)
+    return paginator.object_list[:per_page + 1]
+
+
+def pick_pk(queryset, **lookup):
+    if lookup:
+        queryset = queryset.filter(**lookup)
+    return queryset.order_by().values_list('pk', flat=True).first() or 0
+
+
+class Command(BaseCommand):
+    help = 'Печатает планы запросов лент, чтобы проверить индексы.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--group', help='slug группы для group_list.')
+        parser.add_argument('--user', help='username для profile и follow.')
+        parser.add_argument('--post', type=int, help='id поста для комментов.')
+
+    def feed_querysets(self, group_id, user_id, post_id):
+        return (
+            ('posts:index', first_page(Post.objects.for_feed())),
+            ('posts:group_list', first_page(
+                Post.objects.for_feed().filter(group_id=group_id)
+            )),
+            ('posts:profile', first_page(
+                Post.objects.for_feed().filter(author_id=user_id)
+            )),
+            ('posts:follow_index', first_page(
+                timeline.feed_for(user_id), pk_field='post_id'
+            )),
+            ('posts:post_detail', first_page(
+                Comment.objects.filter(post_id=post_id).select_related(
+                    'author'
+                ).only('text', 'created', 'post', 'author__username'),
+                COMMENTS_PER_PAGE,
+                key_field='created', pk_field='id', ascending=True,
+            )),
+        )
+
+    def handle(self, *args, group=None, user=None, post=None, **options):
+        group_id = pick_pk(Group.objects, **({'slug': group} if group else {}))
+        user_id = pick_pk(User.objects, **({'username': user} if user else {}))
+        post_id = post or pick_pk(Post.objects)
+        for name, queryset in self.feed_querysets(group_id, user_id, post_id):
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(str(queryset.query))
+            self.stdout.write(queryset.explain())
+            self.stdout.write('')
@@ -0,0 +1,55 @@
+
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты в NDJSON или CSV потоком, пачками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'output', help='Файл выгрузки или «-» для stdout.'
+        )
+        parser.add_argument('--format', choices=transfer.FORMATS)
+        parser.add_argument(
+            '--batch-size', type=int, default=transfer.BATCH_SIZE
+        )
+        parser.add_argument(
+            '--after-id', type=int, default=0,
+            help='Выгрузить только посты с id больше указанного.'
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Продолжить прерванную выгрузку с контрольной точки.'
+        )
+
+    def handle(self, *args, output, **options):
+        fmt = transfer.detect_format(output, options['format'])
+        if output == '-':
+            transfer.export_posts(
+                self.stdout, fmt, after=options['after_id'],
+                batch_size=options['batch_size'], log=self.stderr.write,
+            )
+            return
+        checkpoint = transfer.Checkpoint(output)
+        after, offset = options['after_id'], None
+        if options['resume']:
+            state = checkpoint.load()
+            after = state.get('last_id', after)
+            offset = state.get('offset')
+        if offset is not None:
+            mode = 'r+'
+        else:
+            mode = 'a' if after else 'w'
+        with open(output, mode, encoding='utf-8', newline='') as stream:
+            if offset is not None:
+                # Строки, дописанные после контрольной точки, могли
+                # оборваться на середине: отбрасываем их целиком.
+                stream.seek(offset)
+                stream.truncate()
+            rows = transfer.export_posts(
+                stream, fmt, after=after, batch_size=options['batch_size'],
+                checkpoint=checkpoint, log=self.stdout.write,
+            )
+        self.stdout.write(self.style.SUCCESS(f'Выгружено постов: {rows}'))
@@ -0,0 +1,94 @@
+import sys
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import transfer
+
+
+def image_mapping(value):
+    old, separator, new = value.partition('=')
+    if not separator:
+        raise ValueError(value)
+    return old, new
+
+
+class Command(BaseCommand):
+    help = 'Загружает посты из NDJSON или CSV пачками через bulk_create.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'input', help='Файл выгрузки или «-» для stdin.'
+        )
+        parser.add_argument('--format', choices=transfer.FORMATS)
+        parser.add_argument(
+            '--batch-size', type=int, default=transfer.BATCH_SIZE
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Продолжить прерванную загрузку с контрольной точки.'
+        )
+        parser.add_argument(
+            '--keep-ids', action='store_true',
+            help='Сохранить id постов из выгрузки.'
+        )
+        parser.add_argument(
+            '--create-missing', action='store_true',
+            help='Создавать неизвестных авторов и группы.'
+        )
+        parser.add_argument(
+            '--image-map', type=image_mapping, action='append', default=[],
+            metavar='OLD=NEW',
+            help='Заменить префикс пути картинки; можно указать несколько.'
+        )
+        parser.add_argument(
+            '--skip-search', action='store_true',
+            help='Не индексировать загруженные посты для поиска.'
+        )
+        parser.add_argument(
+            '--rebuild-derived', action='store_true',
+            help='Вместо дополнения по пачкам пересобрать ленты, счётчики '
+                 'и поисковый индекс целиком после загрузки.'
+        )
+
+    def handle(self, *args, input, **options):
+        fmt = transfer.detect_format(input, options['format'])
+        importer = transfer.PostImporter(
+            keep_ids=options['keep_ids'],
+            create_missing=options['create_missing'],
+            image_map=options['image_map'],
+        )
+        checkpoint = None
+        if input == '-':
+            if options['resume']:
+                raise CommandError('Из stdin продолжить загрузку нельзя')
+            stream = nullcontext(sys.stdin.buffer)
+        else:
+            checkpoint = transfer.Checkpoint(input)
+            if not options['resume']:
+                checkpoint.clear()
+            try:
+                stream = open(input, 'rb')
+            except OSError as error:
+                raise CommandError(error)
+        with stream as source:
+            result = transfer.import_posts(
+                source, fmt, importer=importer,
+                batch_size=options['batch_size'],
+                checkpoint=checkpoint, log=self.stdout.write,
+                derived=not options['rebuild_derived'],
+                index_search=not options['skip_search'],
+            )
+        if options['rebuild_derived']:
+            transfer.rebuild_derived(
+                index_search=not options['skip_search'],
+                log=self.stdout.write,
+            )
+        skipped = ', '.join(
+            f'{reason}: {count}'
+            for reason, count in sorted(result['skipped'].items())
+        ) or 'нет'
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано постов: {result["created"]} из {result["rows"]}; '
+            f'пропущено — {skipped}'
+        ))
@@ -0,0 +1,76 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+
+from posts.images import render_derivatives, save_derivatives
+from posts.models import Post
+from posts.thumbnails import render_thumbnails
+
+logger = logging.getLogger(__name__)
+# Сколько постов на поток отдаётся в пул за раз: память не растёт
+# с размером таблицы.
+CHUNK_PER_WORKER = 8
+
+
+def chunked(rows, size):
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = (
+        'Заранее готовит миниатюры и производные картинок постов для лент.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Число потоков обработки картинок.'
+        )
+        parser.add_argument(
+            '--skip-derivatives', action='store_true',
+            help='Только миниатюры sorl, без WebP/AVIF и srcset.'
+        )
+
+    def process(self, row, skip_derivatives):
+        post_id, image_name = row
+        try:
+            render_thumbnails(image_name)
+            if skip_derivatives:
+                return post_id, None, True
+            derivatives = render_derivatives(post_id, image_name)
+        except Exception:
+            logger.exception('Не удалось подготовить миниатюры %s', image_name)
+            return post_id, None, False
+        return post_id, derivatives, True
+
+    def handle(self, *args, workers, skip_derivatives, **options):
+        images = Post.objects.exclude(image='').values_list(
+            'pk', 'image'
+        ).order_by()
+        process = partial(self.process, skip_derivatives=skip_derivatives)
+        workers = max(workers, 1)
+        done = failed = 0
+        # Потоки только сжимают картинки, а пишет в базу основной поток:
+        # у SQLite всё равно один писатель.
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for chunk in chunked(images.iterator(),
+                                 workers * CHUNK_PER_WORKER):
+                for post_id, derivatives, ok in executor.map(process, chunk):
+                    if not ok:
+                        failed += 1
+                        continue
+                    if derivatives is not None:
+                        save_derivatives(post_id, derivatives)
+                    done += 1
+        if failed:
+            self.stderr.write(f'Не удалось обработать постов: {failed}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Подготовлено миниатюр для {done} постов'
+        ))
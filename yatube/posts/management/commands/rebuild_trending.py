@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рейтинг популярных постов по комментариям '
+        'и подпискам за последнюю неделю. Запускать по расписанию.'
+    )
+
+    def handle(self, *args, **options):
+        total = trending.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Постов в рейтинге: {total}'
+        ))
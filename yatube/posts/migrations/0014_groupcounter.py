@@ -0,0 +1,42 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_group_counters(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    GroupCounter = apps.get_model('posts', 'GroupCounter')
+    groups = Group.objects.annotate(
+        posts_total=models.Count('posts'),
+        last=models.Max('posts__pub_date'),
+    )
+    GroupCounter.objects.bulk_create(
+        (
+            GroupCounter(
+                group_id=group.pk,
+                posts_count=group.posts_total,
+                last_post=group.last,
+            )
+            for group in groups.iterator()
+        ),
+        batch_size=1000,
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_imagederivative'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupCounter',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='counters', serialize=False, to='posts.Group', verbose_name='Группа')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Постов')),
+                ('last_post', models.DateTimeField(blank=True, null=True, verbose_name='Последний пост')),
+            ],
+        ),
+        migrations.RunPython(fill_group_counters, migrations.RunPython.noop),
+    ]
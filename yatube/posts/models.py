@@ -3,6 +3,14 @@ from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+FEED_DEFERRED_FIELDS = (
+    'author__password',
+    'author__last_login',
+    'author__email',
+    'author__date_joined',
+    'group__description',
+)
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200)
@@ -13,12 +21,23 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        return self.select_related('author', 'group').defer(
+            *FEED_DEFERRED_FIELDS
+        ).prefetch_related('derivatives')
+
+
 class Post(models.Model):
     text = models.TextField()
     pub_date = models.DateTimeField(
         auto_now_add=True,
         db_index=True
     )
+    updated = models.DateTimeField(
+        'Изменён',
+        auto_now=True
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -37,9 +56,26 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    comments_count = models.PositiveIntegerField(
+        'Комментариев',
+        default=0,
+        editable=False
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('group', '-pub_date', '-id'),
+                name='post_group_feed_idx'
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_feed_idx'
+            ),
+        )
 
     def __str__(self) -> str:
         return self.text[:15]
@@ -62,6 +98,14 @@ class Comment(models.Model):
         auto_now_add=True
     )
 
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('post', 'created', 'id'),
+                name='comment_post_keyset_idx'
+            ),
+        )
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -76,6 +120,11 @@ class Follow(models.Model):
         related_name="following",
         verbose_name='Автор'
     )
+    created = models.DateTimeField(
+        'Создана',
+        auto_now_add=True,
+        null=True
+    )
 
     class Meta:
         constraints = (
@@ -84,3 +133,136 @@ class Follow(models.Model):
                 name='unique_follow'
             ),
         )
+
+
+class UserCounter(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='counters',
+        verbose_name='Пользователь'
+    )
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+
+
+class GroupCounter(models.Model):
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='counters',
+        verbose_name='Группа'
+    )
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+    last_post = models.DateTimeField('Последний пост', null=True, blank=True)
+
+
+class TrendingPost(models.Model):
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending',
+        verbose_name='Пост'
+    )
+    # log2 суммы затухающих вкладов, приведённых к posts.trending.EPOCH
+    score = models.FloatField('Рейтинг')
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('-score', '-post'),
+                name='trending_score_idx'
+            ),
+        )
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'post',),
+                name='unique_timeline_entry'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date', '-post'),
+                name='timeline_user_feed_idx'
+            ),
+            models.Index(
+                fields=('user', 'author'),
+                name='timeline_user_author_idx'
+            ),
+        )
+
+
+class SearchTerm(models.Model):
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='search_terms',
+        verbose_name='Пост'
+    )
+    term = models.CharField('Терм', max_length=64)
+    weight = models.PositiveSmallIntegerField('Вес', default=1)
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('post', 'term',),
+                name='unique_search_term'
+            ),
+        )
+        indexes = (
+            models.Index(fields=('term', 'post'), name='search_term_idx'),
+        )
+
+
+class ImageDerivative(models.Model):
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='derivatives',
+        verbose_name='Пост'
+    )
+    file = models.FileField('Файл', upload_to='posts/derived/')
+    format = models.CharField('Формат', max_length=8)
+    width = models.PositiveIntegerField('Ширина')
+    height = models.PositiveIntegerField('Высота')
+    size = models.PositiveIntegerField('Размер, байт')
+
+    class Meta:
+        ordering = ('width',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('post', 'format', 'width',),
+                name='unique_image_derivative'
+            ),
+        )
+
+    def __str__(self) -> str:
+        return f'{self.format} {self.width}x{self.height}'
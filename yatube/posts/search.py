@@ -0,0 +1,127 @@
+import math
+import re
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import (
+    Case, Count, ExpressionWrapper, F, FloatField, Sum, Value, When
+)
+
+from .models import Post, SearchTerm
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+MIN_STEM_LENGTH = 3
+MAX_TERM_LENGTH = 64
+MAX_QUERY_TERMS = 8
+BATCH_SIZE = 1000
+
+STOP_WORDS = frozenset((
+    'а', 'без', 'бы', 'в', 'во', 'вот', 'все', 'да', 'для', 'до', 'его',
+    'ее', 'же', 'за', 'и', 'из', 'или', 'им', 'их', 'к', 'как', 'ко',
+    'ли', 'мне', 'мы', 'на', 'над', 'не', 'нет', 'ни', 'но', 'о', 'об',
+    'он', 'она', 'они', 'оно', 'от', 'по', 'под', 'при', 'с', 'со', 'так',
+    'то', 'ты', 'у', 'уже', 'что', 'это', 'я',
+    'a', 'an', 'and', 'in', 'is', 'of', 'on', 'or', 'the', 'to',
+))
+
+# Окончания русских слов, от длинных к коротким: лёгкий стеммер,
+# которого хватает, чтобы «постов» и «посты» давали один терм.
+ENDINGS = tuple(sorted((
+    'иями', 'ями', 'ами', 'ией', 'иям', 'ием', 'иях', 'ого', 'его', 'ому',
+    'ему', 'ыми', 'ими', 'ая', 'яя', 'ое', 'ее', 'ие', 'ые', 'ой', 'ей',
+    'ий', 'ый', 'ом', 'ем', 'ам', 'ям', 'ах', 'ях', 'ов', 'ев', 'ия',
+    'ью', 'ую', 'юю', 'ать', 'ять', 'ить', 'еть', 'ешь', 'ет', 'ут', 'ют',
+    'ит', 'ат', 'ят', 'ла', 'ло', 'ли', 'ть', 'а', 'я', 'о', 'е', 'ы',
+    'и', 'у', 'ю', 'ь', 'й',
+), key=len, reverse=True))
+
+
+def stem(word):
+    for ending in ENDINGS:
+        if (word.endswith(ending)
+                and len(word) - len(ending) >= MIN_STEM_LENGTH):
+            return word[:-len(ending)]
+    return word
+
+
+def tokenize(text):
+    text = text.lower().replace('ё', 'е')
+    for word in WORD_RE.findall(text):
+        if word in STOP_WORDS or (word.isdigit() and len(word) < 2):
+            continue
+        yield stem(word)[:MAX_TERM_LENGTH]
+
+
+def _terms(post):
+    weights = Counter(tokenize(post.text))
+    return (
+        SearchTerm(post_id=post.pk, term=term, weight=weight)
+        for term, weight in weights.items()
+    )
+
+
+def index_post(post):
+    with transaction.atomic():
+        SearchTerm.objects.filter(post_id=post.pk).delete()
+        SearchTerm.objects.bulk_create(_terms(post), batch_size=BATCH_SIZE)
+
+
+def _index(posts):
+    batch = []
+    for post in posts.order_by().only('pk', 'text').iterator():
+        batch.extend(_terms(post))
+        if len(batch) >= BATCH_SIZE:
+            SearchTerm.objects.bulk_create(batch)
+            batch = []
+    SearchTerm.objects.bulk_create(batch)
+
+
+def index_posts(posts):
+    """Индексирует новые посты, вставленные без сигналов."""
+    with transaction.atomic():
+        _index(posts)
+
+
+def rebuild():
+    with transaction.atomic():
+        SearchTerm.objects.all().delete()
+        _index(Post.objects.all())
+
+
+def query_terms(query):
+    return list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+
+
+def search(query, queryset=None):
+    """Посты по убыванию TF-IDF ранга; ранг лежит в поле ``rank``."""
+    if queryset is None:
+        queryset = Post.objects.all()
+    nothing = queryset.annotate(
+        rank=Value(0.0, output_field=FloatField())
+    ).none()
+    terms = query_terms(query)
+    if not terms:
+        return nothing
+    # Максимальный id вместо COUNT(*): для IDF достаточно оценки.
+    total = Post.objects.order_by('-pk').values_list(
+        'pk', flat=True
+    ).first() or 1
+    frequencies = SearchTerm.objects.filter(term__in=terms).values(
+        'term'
+    ).annotate(posts=Count('post')).values_list('term', 'posts')
+    weights = [
+        When(
+            search_terms__term=term,
+            then=ExpressionWrapper(
+                F('search_terms__weight')
+                * Value(math.log(1 + total / count)),
+                output_field=FloatField(),
+            ),
+        )
+        for term, count in frequencies
+    ]
+    if not weights:
+        return nothing
+    return queryset.filter(search_terms__term__in=terms).annotate(
+        rank=Sum(Case(*weights, default=0, output_field=FloatField()))
+    )
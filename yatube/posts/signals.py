@@ -0,0 +1,199 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import counters, identity, search, timeline, trending
+from .cache import bump_generation
+from .models import (
+    Comment, Follow, Group, GroupCounter, ImageDerivative, Post, User,
+    UserCounter
+)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.fan_out_post(instance)
+
+
+@receiver(post_save, sender=Follow)
+def fill_timeline_on_follow(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.add_author(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def clear_timeline_on_unfollow(sender, instance, **kwargs):
+    timeline.remove_author(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_feed_cache(sender, **kwargs):
+    bump_generation()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_feeds_on_author_change(sender, update_fields=None,
+                                      created=False, **kwargs):
+    # Имена авторов выводятся в лентах; вход пишет только last_login,
+    # а у нового пользователя ещё нет постов.
+    if created:
+        return
+    if update_fields is not None and not set(update_fields) & set(
+        identity.users.fields
+    ):
+        return
+    bump_generation()
+
+
+@receiver(post_save, sender=User)
+def create_user_counter(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserCounter.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+def count_new_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.bump_user(instance.author_id, 'posts_count', 1)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    counters.bump_user(instance.author_id, 'posts_count', -1)
+
+
+@receiver(post_save, sender=Group)
+def create_group_counter(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        GroupCounter.objects.get_or_create(group=instance)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_group(sender, instance, raw=False, **kwargs):
+    # Группу могут сменить при правке: счётчики поправятся у обеих.
+    if not raw and not instance._state.adding:
+        instance._previous_group_id = Post.objects.filter(
+            pk=instance.pk
+        ).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def count_group_post(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = None if created else getattr(
+        instance, '_previous_group_id', instance.group_id
+    )
+    if previous == instance.group_id:
+        return
+    if previous is not None:
+        counters.remove_group_post(previous)
+    if instance.group_id is not None:
+        counters.add_group_post(instance.group_id, instance.pub_date)
+    counters.forget_group_directory()
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_group_post(sender, instance, **kwargs):
+    if instance.group_id is not None:
+        counters.remove_group_post(instance.group_id)
+        counters.forget_group_directory()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_directory(sender, **kwargs):
+    counters.forget_group_directory()
+
+
+@receiver(post_save, sender=Comment)
+def count_new_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.bump_comments(instance.post_id, 1)
+
+
+@receiver(post_save, sender=Comment)
+def rank_commented_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and instance.post_id is not None:
+        trending.record_comments([instance])
+
+
+@receiver(post_save, sender=Follow)
+def rank_followed_author(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        trending.record_follow(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    counters.bump_comments(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def count_new_follow(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.bump_user(instance.author_id, 'followers_count', 1)
+        counters.bump_user(instance.user_id, 'following_count', 1)
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    counters.bump_user(instance.author_id, 'followers_count', -1)
+    counters.bump_user(instance.user_id, 'following_count', -1)
+
+
+@receiver(post_save, sender=Post)
+def index_post_text(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_post(instance)
+
+
+@receiver(post_delete, sender=ImageDerivative)
+def delete_derivative_file(sender, instance, **kwargs):
+    instance.file.delete(save=False)
+
+
+def _identity(sender):
+    return identity.groups if sender is Group else identity.users
+
+
+@receiver(pre_save, sender=Group)
+@receiver(pre_save, sender=User)
+def remember_identity(sender, instance, raw=False, update_fields=None,
+                      **kwargs):
+    # После переименования старый slug или имя не должны вести на объект.
+    field = _identity(sender).field
+    if raw or instance._state.adding:
+        return
+    if update_fields is None or field in update_fields:
+        instance._previous_identity = sender.objects.filter(
+            pk=instance.pk
+        ).values_list(field, flat=True).first()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_save, sender=User)
+def invalidate_identity(sender, instance, update_fields=None, **kwargs):
+    # Вход пользователя пишет только last_login: кэш тут ни при чём.
+    cache = _identity(sender)
+    if update_fields is not None and not set(update_fields) & set(
+        cache.fields
+    ):
+        return
+    cache.forget(
+        getattr(instance, cache.field),
+        getattr(instance, '_previous_identity', None),
+    )
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=User)
+def forget_deleted_identity(sender, instance, **kwargs):
+    cache = _identity(sender)
+    cache.forget(getattr(instance, cache.field))
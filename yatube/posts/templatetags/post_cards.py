@@ -0,0 +1,11 @@
+from django import template
+
+from posts.cards import render_cards
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(posts):
+    """Готовый HTML карточек постов, по одной строке на пост."""
+    return render_cards(posts)
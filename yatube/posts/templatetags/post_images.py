@@ -0,0 +1,15 @@
+from django import template
+
+from posts.images import picture
+
+register = template.Library()
+
+
+@register.inclusion_tag('includes/picture.html')
+def post_picture(post, sizes='(max-width: 576px) 100vw, 480px'):
+    """<picture> из производных картинки; без них — миниатюра sorl."""
+    return {
+        'image': post.image,
+        'picture': picture(post.derivatives.all()),
+        'sizes': sizes,
+    }
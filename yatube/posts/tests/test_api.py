@@ -0,0 +1,104 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='api_author')
+        cls.reader = User.objects.create_user(username='api_reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='api-group', description='Описание'
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.author, group=cls.group, text=f'Пост {number}')
+            for number in range(25)
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Последний пост'
+        )
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def test_endpoints_return_json(self):
+        """Все ресурсы API отдают JSON нужной формы."""
+        urls = {
+            reverse('api_v1:post_list'): 20,
+            reverse('api_v1:group_list'): 1,
+            reverse('api_v1:group_posts', args=['api-group']): 20,
+            reverse('api_v1:profile_posts', args=['api_author']): 20,
+            reverse('api_v1:comment_list', args=[self.post.pk]): 1,
+        }
+        for url, size in urls.items():
+            with self.subTest(url=url):
+                data = self.client.get(url).json()
+                self.assertEqual(len(data['results']), size)
+        data = self.client.get(
+            reverse('api_v1:post_detail', args=[self.post.pk])
+        ).json()
+        self.assertEqual(data['author'], 'api_author')
+        self.assertEqual(data['group'], 'api-group')
+        self.assertEqual(data['comments_count'], 1)
+
+    def test_missing_objects_return_404(self):
+        """Несуществующие группа, автор и пост дают 404."""
+        urls = (
+            reverse('api_v1:group_posts', args=['missing']),
+            reverse('api_v1:profile_posts', args=['missing']),
+            reverse('api_v1:post_detail', args=[0]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_cursor_walks_all_posts(self):
+        """Ссылка next ведёт на следующую страницу без повторов."""
+        first = self.client.get(reverse('api_v1:post_list')).json()
+        second = self.client.get(first['next']).json()
+        ids = [row['id'] for row in first['results'] + second['results']]
+        self.assertEqual(len(set(ids)), 26)
+        self.assertIsNone(second['next'])
+        self.assertEqual(ids[0], self.post.pk)
+
+    def test_unchanged_page_returns_304(self):
+        """Повторный запрос с ETag отдаёт 304, пока посты не изменились."""
+        url = reverse('api_v1:post_list')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_follow_feed_requires_login(self):
+        """Лента подписок — только для вошедших и меняется при отписке."""
+        url = reverse('api_v1:follow_feed')
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.client.force_login(self.reader)
+        response = self.client.get(url)
+        self.assertEqual(len(response.json()['results']), 20)
+        Follow.objects.filter(user=self.reader).delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [])
+
+    def test_follow_feed_304_reads_timeline_head_only(self):
+        """304 по ленте подписок не пересчитывает всю ленту читателя."""
+        url = reverse('api_v1:follow_feed')
+        self.client.force_login(self.reader)
+        etag = self.client.get(url)['ETag']
+        # Сессия, пользователь и дата самой новой записи ленты.
+        with self.assertNumQueries(3):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        other = User.objects.create_user(username='api_other')
+        Follow.objects.create(user=self.reader, author=other)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,103 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from posts import benchmark
+from posts.models import (
+    Comment, Follow, Post, TimelineEntry, User, UserCounter
+)
+
+
+class BenchmarkTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command(
+            'seed_data', users=6, groups=2, posts=30, comments=10,
+            follows=8, stdout=StringIO()
+        )
+
+    def test_seed_data_builds_derived_tables(self):
+        """seed_data создаёт строки и пересобирает ленты и счётчики."""
+        self.assertEqual(Post.objects.count(), 30)
+        self.assertEqual(Follow.objects.count(), 8)
+        self.assertEqual(UserCounter.objects.count(), User.objects.count())
+        expected = sum(
+            Post.objects.filter(author_id=follow.author_id).count()
+            for follow in Follow.objects.all()
+        )
+        self.assertEqual(TimelineEntry.objects.count(), expected)
+
+    def test_seed_after_deleted_posts(self):
+        """seed_data работает, когда id постов идут не подряд."""
+        Post.objects.filter(
+            pk__in=list(Post.objects.order_by('pk')[:20].values_list(
+                'pk', flat=True
+            ))
+        ).delete()
+        before = Comment.objects.count()
+        call_command(
+            'seed_data', users=0, groups=0, posts=0, comments=50,
+            follows=0, stdout=StringIO()
+        )
+        self.assertEqual(Comment.objects.count(), before + 50)
+        self.assertFalse(
+            Comment.objects.exclude(post__in=Post.objects.all()).exists()
+        )
+
+    def test_benchmark_covers_every_url(self):
+        """Отчёт содержит все маршруты posts с холодным и тёплым кэшем."""
+        report = benchmark.run(repeat=1)
+        names = {
+            f'posts:{pattern.name}' for pattern in benchmark.urlpatterns
+        }
+        self.assertEqual(set(report['results']), names)
+        for name, result in report['results'].items():
+            with self.subTest(name=name):
+                self.assertIn('median_ms', result['cold'])
+                self.assertIn('median_ms', result['warm'])
+        self.assertEqual(report['meta']['rows']['posts'], 30)
+        self.assertEqual(benchmark.unexpected_statuses(report), [])
+
+    def test_benchmark_requires_explicit_flag(self):
+        """Без --allow-writes бенчмарк не трогает базу и кэш."""
+        with self.assertRaises(CommandError):
+            call_command('benchmark_views', repeat=1, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 30)
+
+    def test_regression_fails_check(self):
+        """Рост медианы сверх допуска завершает команду ошибкой."""
+        report = benchmark.run(repeat=1)
+        for result in report['results'].values():
+            result['cold']['median_ms'] = 0.0001
+        handle, path = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        try:
+            benchmark.dump(report, path)
+            with open(path, encoding='utf-8') as saved:
+                self.assertEqual(json.load(saved)['meta'], report['meta'])
+            with self.assertRaises(CommandError):
+                call_command(
+                    'benchmark_views', repeat=1, baseline=path,
+                    tolerance=0.1, allow_writes=True,
+                    stdout=StringIO(), stderr=StringIO()
+                )
+        finally:
+            os.remove(path)
+
+    def test_card_benchmark_reports_cold_and_warm(self):
+        """Замер карточек сравнивает рендер без кэша, холодный и тёплый."""
+        out = StringIO()
+        call_command(
+            'benchmark_cards', count=10, repeat=2, allow_writes=True,
+            stdout=out
+        )
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['cards'], 10)
+        self.assertEqual(
+            set(report['results']), {'uncached', 'cold', 'warm'}
+        )
@@ -0,0 +1,177 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import OperationalError
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import comment_queue
+from posts.models import Comment, Post, User
+
+
+@override_settings(COMMENT_QUEUE_BATCH=50)
+@mock.patch('posts.comment_queue._start_flusher')
+class CommentQueueTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='queue_author')
+        cls.reader = User.objects.create_user(username='queue_reader')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.url = reverse('posts:add_comment', args=(self.post.pk,))
+        self.detail = reverse('posts:post_detail', args=(self.post.pk,))
+
+    def tearDown(self):
+        comment_queue.drain()
+
+    def test_comment_is_acknowledged_before_write(self, start_flusher):
+        """Комментарий принимается сразу, а в базу попадает пачкой."""
+        # Сессия, пользователь и проверка поста — ни одной записи.
+        with self.assertNumQueries(3):
+            response = self.reader_client.post(
+                self.url, {'text': 'В очереди'}
+            )
+        self.assertRedirects(response, self.detail)
+        start_flusher.assert_called_once()
+        self.assertFalse(Comment.objects.exists())
+        comment_queue.drain()
+        self.assertTrue(
+            Comment.objects.filter(text='В очереди', author=self.reader)
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+
+    def test_concurrent_pending_updates_are_not_lost(self, start_flusher):
+        """Дописывание и вычистка списка не затирают друг друга."""
+        def comment(token):
+            return mock.Mock(
+                post_id=self.post.pk, author_id=self.reader.pk,
+                pending_token=token, text=token,
+            )
+
+        flushed = [comment(f'old-{number}') for number in range(20)]
+        for entry in flushed:
+            comment_queue._remember(entry)
+        fresh = [comment(f'new-{number}') for number in range(20)]
+        threads = [
+            threading.Thread(target=comment_queue._remember, args=(entry,))
+            for entry in fresh
+        ] + [
+            threading.Thread(target=comment_queue._forget, args=([entry],))
+            for entry in flushed
+        ]
+        get = comment_queue.posts_cache.get
+
+        def slow_get(*args, **kwargs):
+            # Растягиваем окно между чтением и записью списка.
+            value = get(*args, **kwargs)
+            time.sleep(0.002)
+            return value
+
+        with mock.patch.object(
+            comment_queue.posts_cache, 'get', side_effect=slow_get
+        ):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        pending = comment_queue.pending_for(self.post.pk, self.reader)
+        self.assertCountEqual(
+            [entry.text for entry in pending],
+            [entry.text for entry in fresh],
+        )
+
+    def test_author_sees_pending_comment(self, start_flusher):
+        """Автор видит свой комментарий до записи, другие — нет."""
+        etag = self.reader_client.get(self.detail)['ETag']
+        self.reader_client.post(self.url, {'text': 'Ещё не записан'})
+        response = self.reader_client.get(
+            self.detail, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertContains(response, 'Ещё не записан')
+        author_client = Client()
+        author_client.force_login(self.author)
+        self.assertNotContains(
+            author_client.get(self.detail), 'Ещё не записан'
+        )
+        comment_queue.drain()
+        response = self.reader_client.get(self.detail)
+        self.assertContains(response, 'Ещё не записан', count=1)
+
+    def test_invalid_comment_is_not_queued(self, start_flusher):
+        """Пустой комментарий не проходит CommentForm и не ставится."""
+        self.reader_client.post(self.url, {'text': ''})
+        start_flusher.assert_not_called()
+        self.assertEqual(
+            comment_queue.pending_count(self.post.pk, self.reader.pk), 0
+        )
+
+    def test_flush_skips_deleted_posts(self, start_flusher):
+        """Комментарии к удалённому посту отбрасываются, а не ломают пачку."""
+        doomed = Post.objects.create(author=self.author, text='Удалят')
+        for post in (doomed, self.post):
+            self.reader_client.post(
+                reverse('posts:add_comment', args=(post.pk,)),
+                {'text': 'Пачка'},
+            )
+        doomed.delete()
+        comment_queue.drain()
+        self.assertEqual(
+            list(Comment.objects.values_list('post_id', flat=True)),
+            [self.post.pk],
+        )
+
+    def test_flush_skips_deleted_authors(self, start_flusher):
+        """Комментарий удалённого пользователя не губит остальную пачку."""
+        doomed = User.objects.create_user(username='queue_doomed')
+        doomed_client = Client()
+        doomed_client.force_login(doomed)
+        for client in (doomed_client, self.reader_client):
+            client.post(self.url, {'text': 'Пачка'})
+        doomed.delete()
+        comment_queue.drain()
+        self.assertEqual(
+            list(Comment.objects.values_list('author_id', flat=True)),
+            [self.reader.pk],
+        )
+
+    @mock.patch('posts.comment_queue.time.sleep')
+    def test_failed_batch_is_retried(self, sleep, start_flusher):
+        """Пачка, упавшая на записи, пишется по одному и повторяется."""
+        for text in ('Первый', 'Второй'):
+            self.reader_client.post(self.url, {'text': text})
+        bulk_create = Comment.objects.bulk_create
+        errors = iter([OperationalError('database is locked')] * 2)
+
+        def flaky(objs, *args, **kwargs):
+            error = next(errors, None)
+            if error:
+                raise error
+            return bulk_create(objs, *args, **kwargs)
+
+        with mock.patch.object(
+            Comment.objects, 'bulk_create', side_effect=flaky
+        ), self.assertLogs('posts.comment_queue', 'ERROR'):
+            comment_queue.drain()
+        self.assertCountEqual(
+            Comment.objects.values_list('text', flat=True),
+            ['Первый', 'Второй'],
+        )
+        sleep.assert_called_once_with(comment_queue.RETRY_DELAY)
+        self.assertEqual(
+            comment_queue.pending_count(self.post.pk, self.reader.pk), 0
+        )
+
+    def test_flusher_writes_collected_batch_on_stop(self, start_flusher):
+        """Остановка потока не теряет пачку, уже вынутую из очереди."""
+        self.reader_client.post(self.url, {'text': 'В полёте'})
+        comment_queue._queue.put(comment_queue._STOP)
+        comment_queue._run()
+        self.assertTrue(Comment.objects.filter(text='В полёте').exists())
@@ -3,11 +3,14 @@ import shutil
 import tempfile
 
 from http import HTTPStatus
+from io import StringIO
+from unittest import mock
 
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 
 from posts.models import Group, Post, User, Comment
 from posts.forms import PostForm
@@ -30,6 +33,7 @@ class PostsFormsTests(TestCase):
             b'\x00\x00\x01\x00\x01\x00\x00\x02'
             b'\x02\x4c\x01\x00\x3b'
         )
+        cls.image_content = small_gif
         cls.image = SimpleUploadedFile(
             name='small.gif',
             content=small_gif,
@@ -127,3 +131,55 @@ class PostsFormsTests(TestCase):
             text=comment['text'],
             author=comment['author']).exists())
         self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    @override_settings(THUMBNAIL_WORKERS=0)
+    def test_create_post_pregenerates_thumbnails(self):
+        """Миниатюры картинки готовятся при сохранении формы."""
+        image = SimpleUploadedFile(
+            name='thumb.gif',
+            content=self.image_content,
+            content_type='image/gif'
+        )
+        with mock.patch('posts.thumbnails.get_thumbnail') as get_thumbnail:
+            self.authorized_client.post(
+                reverse('posts:post_create'),
+                data={'text': 'Картинка', 'image': image},
+            )
+        post = Post.objects.get(text='Картинка')
+        get_thumbnail.assert_called_once_with(
+            post.image.name, '480x169', crop='center', upscale=True
+        )
+
+    def test_pregenerate_thumbnails_command(self):
+        """Команда pregenerate_thumbnails обходит посты с картинками."""
+        with mock.patch(
+            'posts.management.commands.pregenerate_thumbnails.'
+            'render_thumbnails'
+        ) as render_thumbnails:
+            call_command('pregenerate_thumbnails', stdout=StringIO())
+        render_thumbnails.assert_called_once_with(self.post.image.name)
+
+    def test_pregenerate_thumbnails_survives_broken_image(self):
+        """Ошибка на одной картинке не прерывает обработку остальных."""
+        broken = Post.objects.create(
+            author=self.user, image='posts/broken.gif', text='Битая'
+        )
+
+        def render(image_name):
+            if image_name == broken.image.name:
+                raise OSError('broken image')
+
+        stdout, stderr = StringIO(), StringIO()
+        with mock.patch(
+            'posts.management.commands.pregenerate_thumbnails.'
+            'render_thumbnails', side_effect=render
+        ) as render_thumbnails, self.assertLogs(
+            'posts.management.commands.pregenerate_thumbnails', 'ERROR'
+        ):
+            call_command(
+                'pregenerate_thumbnails', skip_derivatives=True,
+                stdout=stdout, stderr=stderr,
+            )
+        self.assertEqual(render_thumbnails.call_count, 2)
+        self.assertIn('для 1 постов', stdout.getvalue())
+        self.assertIn('постов: 1', stderr.getvalue())
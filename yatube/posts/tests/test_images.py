@@ -0,0 +1,111 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts import images
+from posts.models import ImageDerivative, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_upload(name, size, mode='RGB'):
+    buffer = BytesIO()
+    Image.new(mode, size, 'red').save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/png')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ImageDerivativeTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='images_user')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def create_post(self, upload):
+        self.client.post(
+            reverse('posts:post_create'),
+            {'text': 'С картинкой', 'image': upload},
+        )
+        return Post.objects.get(text='С картинкой')
+
+    def test_upload_builds_every_width_and_format(self):
+        """Загрузка строит все ширины во всех доступных форматах."""
+        post = self.create_post(make_upload('big.png', (1600, 900), 'RGBA'))
+        formats = {name for name, _, _ in images.available_formats()}
+        derivatives = ImageDerivative.objects.filter(post=post)
+        self.assertEqual(
+            {(item.format, item.width) for item in derivatives},
+            {(name, width) for name in formats for width in images.WIDTHS},
+        )
+        for derivative in derivatives:
+            with self.subTest(derivative=str(derivative)):
+                self.assertEqual(derivative.file.size, derivative.size)
+                with Image.open(derivative.file.path) as image:
+                    self.assertEqual(
+                        image.size, (derivative.width, derivative.height)
+                    )
+
+    def test_small_image_is_not_upscaled(self):
+        """Узкая картинка даёт только самую малую ширину."""
+        post = self.create_post(make_upload('small.png', (100, 60)))
+        widths = set(
+            post.derivatives.values_list('width', flat=True)
+        )
+        self.assertEqual(widths, {images.WIDTHS[0]})
+
+    def test_card_renders_picture_with_srcset(self):
+        """Карточка в ленте и профиле — <picture> с srcset всех ширин."""
+        post = self.create_post(make_upload('card.png', (1000, 500)))
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:profile', args=(self.user.username,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, '<picture>')
+                for derivative in post.derivatives.filter(
+                    format=images.FALLBACK
+                ):
+                    self.assertContains(
+                        response, f'{derivative.file.url} {derivative.width}w'
+                    )
+
+    def test_built_derivatives_refresh_cached_feed(self):
+        """Готовые производные сбрасывают закэшированную ленту."""
+        post = self.create_post(make_upload('late.png', (1000, 500)))
+        images.clear_derivatives(post.pk)
+        self.assertNotContains(
+            self.client.get(reverse('posts:index')), '<picture>'
+        )
+        images.build_derivatives(post.pk)
+        self.assertContains(
+            self.client.get(reverse('posts:index')), '<picture>'
+        )
+
+    def test_removed_image_drops_derivatives(self):
+        """Если картинку убрали, производные и их файлы удаляются."""
+        post = self.create_post(make_upload('gone.png', (800, 400)))
+        paths = [item.file.path for item in post.derivatives.all()]
+        self.client.post(
+            reverse('posts:post_edit', args=(post.pk,)),
+            {'text': 'Без картинки', 'image-clear': 'on'},
+        )
+        self.assertFalse(post.derivatives.exists())
+        for path in paths:
+            with self.subTest(path=path):
+                with self.assertRaises(FileNotFoundError):
+                    open(path)
@@ -1,6 +1,11 @@
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
 
-from ..models import Post, Group, User
+from ..models import (
+    Comment, Follow, Group, GroupCounter, Post, User, UserCounter
+)
 
 
 class PostModelTests(TestCase):
@@ -30,3 +35,99 @@ class PostModelTests(TestCase):
         group = PostModelTests.group
         expected_group_str = group.title
         self.assertEqual(expected_group_str, str(group))
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='counters_author')
+        cls.reader = User.objects.create_user(username='counters_reader')
+
+    def counters(self, user):
+        return UserCounter.objects.get(user=user)
+
+    def test_counters_follow_writes_and_deletes(self):
+        """Счётчики меняются при создании и удалении записей."""
+        post = Post.objects.create(author=self.author, text='Счётчик')
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text='Коммент'
+        )
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        post.refresh_from_db()
+        self.assertEqual(self.counters(self.author).posts_count, 1)
+        self.assertEqual(self.counters(self.author).followers_count, 1)
+        self.assertEqual(self.counters(self.reader).following_count, 1)
+        self.assertEqual(post.comments_count, 1)
+        comment.delete()
+        follow.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        self.assertEqual(self.counters(self.author).followers_count, 0)
+        self.assertEqual(self.counters(self.reader).following_count, 0)
+        post.delete()
+        self.assertEqual(self.counters(self.author).posts_count, 0)
+
+    def test_recount_repairs_drift(self):
+        """Команда recount исправляет разошедшиеся счётчики."""
+        post = Post.objects.create(author=self.author, text='Счётчик')
+        Comment.objects.create(post=post, author=self.reader, text='Текст')
+        Follow.objects.create(user=self.reader, author=self.author)
+        UserCounter.objects.update(
+            posts_count=7, followers_count=7, following_count=7
+        )
+        Post.objects.update(comments_count=7)
+        call_command('recount', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(self.counters(self.author).posts_count, 1)
+        self.assertEqual(self.counters(self.author).followers_count, 1)
+        self.assertEqual(self.counters(self.reader).following_count, 1)
+        self.assertEqual(self.counters(self.reader).posts_count, 0)
+
+
+class GroupCountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='groups_author')
+        cls.first = Group.objects.create(
+            title='Первая', slug='first', description='Описание'
+        )
+        cls.second = Group.objects.create(
+            title='Вторая', slug='second', description='Описание'
+        )
+
+    def counter(self, group):
+        return GroupCounter.objects.get(group=group)
+
+    def test_counters_follow_posts(self):
+        """Число постов и последний пост меняются при записи и удалении."""
+        old = Post.objects.create(
+            author=self.author, group=self.first, text='Старый'
+        )
+        new = Post.objects.create(
+            author=self.author, group=self.first, text='Новый'
+        )
+        self.assertEqual(self.counter(self.first).posts_count, 2)
+        self.assertEqual(self.counter(self.first).last_post, new.pub_date)
+        new.group = self.second
+        new.save()
+        self.assertEqual(self.counter(self.first).posts_count, 1)
+        self.assertEqual(self.counter(self.first).last_post, old.pub_date)
+        self.assertEqual(self.counter(self.second).posts_count, 1)
+        new.delete()
+        old.delete()
+        self.assertEqual(self.counter(self.second).posts_count, 0)
+        self.assertIsNone(self.counter(self.first).last_post)
+
+    def test_recount_repairs_group_drift(self):
+        """recount пересчитывает и счётчики групп."""
+        post = Post.objects.create(
+            author=self.author, group=self.second, text='Пост'
+        )
+        GroupCounter.objects.update(posts_count=7, last_post=None)
+        call_command('recount', stdout=StringIO())
+        self.assertEqual(self.counter(self.first).posts_count, 0)
+        self.assertEqual(self.counter(self.second).posts_count, 1)
+        self.assertEqual(self.counter(self.second).last_post, post.pub_date)
@@ -1,8 +1,10 @@
 from django.test import TestCase
 from django.urls import reverse
 from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
-from posts.models import Group, Post, User
+from posts.models import Comment, Group, Post, User
 
 
 class PaginatorViewsTest(TestCase):
@@ -67,3 +69,105 @@ class PaginatorViewsTest(TestCase):
                 self.assertEqual(
                     len(response.context['page_obj']), 3
                 )
+
+    def test_cursor_pages_cover_feed_without_gaps(self):
+        """Проверка: курсоры ведут вперёд и назад без пропусков."""
+        url = reverse('posts:group_list', args=(self.group.slug,))
+        first = self.authorized_author.get(url).context['page_obj']
+        self.assertIsNone(first.previous_cursor)
+        second = self.authorized_author.get(
+            url, {'cursor': first.next_cursor}
+        ).context['page_obj']
+        self.assertEqual(len(second), 3)
+        self.assertIsNone(second.next_cursor)
+        pks = [post.pk for post in first] + [post.pk for post in second]
+        self.assertEqual(len(set(pks)), 13)
+        back = self.authorized_author.get(
+            url, {'cursor': second.previous_cursor}
+        ).context['page_obj']
+        self.assertEqual(
+            [post.pk for post in back], [post.pk for post in first]
+        )
+
+    def test_cursor_page_does_not_count_rows(self):
+        """Проверка: страница по курсору не выполняет COUNT(*)."""
+        url = reverse('posts:group_list', args=(self.group.slug,))
+        first = self.authorized_author.get(url).context['page_obj']
+        with CaptureQueriesContext(connection) as queries:
+            self.authorized_author.get(url, {'cursor': first.next_cursor})
+        self.assertFalse(
+            any('COUNT(' in query['sql'] for query in queries)
+        )
+
+    def test_page_navigation_without_count(self):
+        """Проверка: has_next и has_previous верны и не считают строки."""
+        url = reverse('posts:group_list', args=(self.group.slug,))
+        first = self.authorized_author.get(url).context['page_obj']
+        last = self.authorized_author.get(
+            url, {'cursor': first.next_cursor}
+        ).context['page_obj']
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(
+                (first.has_previous(), first.has_next()), (False, True)
+            )
+            self.assertEqual(
+                (last.has_previous(), last.has_next()), (True, False)
+            )
+            self.assertTrue(last.has_other_pages())
+        self.assertEqual(len(queries), 0)
+
+    def test_broken_cursor_returns_first_page(self):
+        """Проверка: испорченный курсор ведёт на первую страницу."""
+        response = self.authorized_author.get(
+            reverse('posts:index'), {'cursor': 'broken'}
+        )
+        self.assertEqual(len(response.context['page_obj']), 10)
+
+
+class CommentPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='comment_pages')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.author, text=f'Коммент {n}')
+            for n in range(45)
+        )
+        cls.order = list(
+            Comment.objects.order_by('created', 'id').values_list(
+                'text', flat=True
+            )
+        )
+
+    def test_post_detail_shows_first_comment_page(self):
+        """На странице поста — первые 20 комментариев от старых к новым."""
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.post.pk,))
+        )
+        texts = [comment.text for comment in response.context['comments']]
+        self.assertEqual(texts, self.order[:20])
+        self.assertContains(
+            response, reverse('posts:post_comments', args=(self.post.pk,))
+        )
+
+    def test_fragments_walk_remaining_comments(self):
+        """Фрагменты отдают остальные страницы без повторов и шаблона base."""
+        page = self.client.get(
+            reverse('posts:post_detail', args=(self.post.pk,))
+        ).context['comments_page']
+        texts = [comment.text for comment in page]
+        url = reverse('posts:post_comments', args=(self.post.pk,))
+        while page.next_cursor:
+            with self.assertNumQueries(3):
+                response = self.client.get(url, {'cursor': page.next_cursor})
+            self.assertTemplateNotUsed(response, 'base.html')
+            page = response.context['comments_page']
+            texts += [comment.text for comment in page]
+        self.assertEqual(texts, self.order)
+        self.assertNotContains(response, 'Ещё комментарии')
+
+    def test_fragment_of_missing_post_is_404(self):
+        """Фрагмент комментариев несуществующего поста — 404."""
+        response = self.client.get(reverse('posts:post_comments', args=(0,)))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,83 @@
+from io import StringIO
+
+from django.contrib.admin.sites import site
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from posts.models import Post, SearchTerm, User
+from posts.search import search, tokenize
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='search_user')
+        cls.rare = Post.objects.create(
+            author=cls.user, text='Кошки гуляют по крыше'
+        )
+        cls.often = Post.objects.create(
+            author=cls.user, text='Кошка, кошки и ещё раз кошкам привет'
+        )
+        cls.other = Post.objects.create(
+            author=cls.user, text='Собаки лают на прохожих'
+        )
+
+    def test_tokenize_normalizes_russian_words(self):
+        """Словоформы сводятся к одному терму, стоп-слова отброшены."""
+        self.assertEqual(
+            list(tokenize('Кошки и КОШКАМ, ёж')),
+            ['кошк', 'кошк', 'еж'],
+        )
+
+    def test_search_ranks_by_term_frequency(self):
+        """Пост с большим числом совпадений выше в выдаче."""
+        response = self.client.get(reverse('posts:search'), {'q': 'кошки'})
+        found = [post.pk for post in response.context['page_obj']]
+        self.assertEqual(found, [self.often.pk, self.rare.pk])
+
+    def test_search_pages_with_cursor(self):
+        """Выдача листается курсором без повторов."""
+        url = reverse('posts:search')
+        first = self.client.get(
+            url, {'q': 'кошки'}
+        ).context['page_obj']
+        self.assertIsNone(first.next_cursor)
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'кошка номер {number}')
+            for number in range(12)
+        )
+        call_command('rebuild_search_index', stdout=StringIO())
+        first = self.client.get(url, {'q': 'кошки'}).context['page_obj']
+        second = self.client.get(
+            url, {'q': 'кошки', 'cursor': first.next_cursor}
+        ).context['page_obj']
+        pks = [post.pk for post in first] + [post.pk for post in second]
+        self.assertEqual(len(pks), 14)
+        self.assertEqual(len(set(pks)), 14)
+
+    def test_edit_reindexes_post(self):
+        """После правки текста пост ищется по новым словам."""
+        self.other.text = 'Теперь здесь про попугаев'
+        self.other.save()
+        self.assertFalse(search('собаки').exists())
+        self.assertEqual(list(search('попугай')), [self.other])
+        self.assertFalse(
+            SearchTerm.objects.filter(post=self.other, term='собак').exists()
+        )
+
+    def test_empty_query_returns_nothing(self):
+        """Пустой запрос не выдаёт постов."""
+        response = self.client.get(reverse('posts:search'), {'q': 'и на'})
+        self.assertEqual(len(response.context['page_obj']), 0)
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке идёт через индекс."""
+        admin = site._registry[Post]
+        request = RequestFactory().get('/admin/posts/post/')
+        queryset, use_distinct = admin.get_search_results(
+            request, Post.objects.all(), 'лают'
+        )
+        self.assertEqual(list(queryset), [self.other])
+        self.assertFalse(use_distinct)
@@ -0,0 +1,184 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from posts import search, transfer
+from posts.models import Follow, Group, Post, TimelineEntry, User
+
+
+class TransferTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='transfer_author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='transfer-group', description='Описание'
+        )
+        cls.pub_date = timezone.make_aware(
+            datetime(2020, 5, 17, 12, 30), timezone.utc
+        )
+        Post.objects.bulk_create(
+            Post(
+                author=cls.author,
+                group=cls.group if number % 2 else None,
+                text=f'Пост, номер {number}\nвторая строка',
+                image='posts/old.gif' if number == 0 else '',
+            )
+            for number in range(5)
+        )
+        Post.objects.update(pub_date=cls.pub_date)
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def export(self, name, **options):
+        path = os.path.join(self.directory, name)
+        call_command(
+            'export_posts', path, batch_size=2, stdout=StringIO(), **options
+        )
+        return path
+
+    def test_round_trip_keeps_fields(self):
+        """Выгрузка и загрузка сохраняют текст, дату, автора и группу."""
+        for name in ('posts.ndjson', 'posts.csv'):
+            with self.subTest(name=name):
+                path = self.export(name)
+                expected = list(Post.objects.order_by('pk').values_list(
+                    'text', 'pub_date', 'author', 'group'
+                ))
+                Post.objects.all().delete()
+                call_command(
+                    'import_posts', path, batch_size=2, stdout=StringIO()
+                )
+                imported = list(Post.objects.order_by('pk').values_list(
+                    'text', 'pub_date', 'author', 'group'
+                ))
+                self.assertEqual(imported, expected)
+
+    def test_import_maps_images_and_skips_unknown(self):
+        """Пути картинок переписываются, неизвестные авторы пропускаются."""
+        path = os.path.join(self.directory, 'posts.ndjson')
+        records = [
+            {'text': 'Картинка', 'author': 'transfer_author',
+             'image': 'posts/old.gif'},
+            {'text': 'Чужой', 'author': 'nobody'},
+        ]
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.writelines(json.dumps(record) + '\n' for record in records)
+        output = StringIO()
+        call_command(
+            'import_posts', path, image_map=[('posts/', 'archive/')],
+            stdout=output,
+        )
+        self.assertTrue(
+            Post.objects.filter(image='archive/old.gif').exists()
+        )
+        self.assertFalse(Post.objects.filter(text='Чужой').exists())
+        self.assertIn('author: 1', output.getvalue())
+
+    def test_import_creates_missing_and_rebuilds_timeline(self):
+        """С --create-missing появляются авторы, группы и записи лент."""
+        reader = User.objects.create_user(username='transfer_reader')
+        stream = BytesIO(
+            'text,author,group\nНовый пост,newcomer,new-group\n'.encode()
+        )
+        importer = transfer.PostImporter(create_missing=True)
+        transfer.import_posts(stream, transfer.CSV, importer=importer)
+        newcomer = User.objects.get(username='newcomer')
+        self.assertTrue(Group.objects.filter(slug='new-group').exists())
+        Follow.objects.create(user=reader, author=newcomer)
+        transfer.rebuild_derived(index_search=False)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=reader).count(), 1
+        )
+
+    def test_import_updates_derived_for_new_posts(self):
+        """Загрузка дополняет ленты, счётчики и индекс без пересборки."""
+        reader = User.objects.create_user(username='transfer_follower')
+        Follow.objects.create(user=reader, author=self.author)
+        untouched = TimelineEntry.objects.filter(user=reader).count()
+        posts_count = self.author.counters.posts_count
+        group_count = self.group.counters.posts_count
+        path = os.path.join(self.directory, 'posts.ndjson')
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(json.dumps({
+                'text': 'Импортированный дирижабль',
+                'author': 'transfer_author', 'group': 'transfer-group',
+            }) + '\n')
+        with mock.patch.object(transfer.timeline, 'rebuild') as rebuild:
+            call_command('import_posts', path, stdout=StringIO())
+        rebuild.assert_not_called()
+        post = Post.objects.get(text='Импортированный дирижабль')
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=reader).count(), untouched + 1
+        )
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=reader, post=post).exists()
+        )
+        self.author.counters.refresh_from_db()
+        self.group.counters.refresh_from_db()
+        self.assertEqual(self.author.counters.posts_count, posts_count + 1)
+        self.assertEqual(self.group.counters.posts_count, group_count + 1)
+        self.assertEqual(list(search.search('дирижабль')), [post])
+
+    def test_import_resumes_from_checkpoint(self):
+        """Повторный запуск продолжает загрузку с сохранённого смещения."""
+        path = self.export('posts.csv')
+        with open(path, 'rb') as stream:
+            records = list(transfer.read_records(stream, transfer.CSV))
+        Post.objects.all().delete()
+        checkpoint = transfer.Checkpoint(path)
+        checkpoint.save(offset=records[2][1], rows=3, created=3)
+        call_command(
+            'import_posts', path, resume=True, stdout=StringIO()
+        )
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertFalse(os.path.exists(checkpoint.path))
+
+    def test_export_resume_truncates_after_checkpoint(self):
+        """Хвост, дописанный после контрольной точки, не дублируется."""
+        path = os.path.join(self.directory, 'posts.ndjson')
+        pks = list(Post.objects.order_by('pk').values_list('pk', flat=True))
+        with open(path, 'w', encoding='utf-8') as stream:
+            transfer.export_posts(stream, after=0, batch_size=100)
+        with open(path, 'r+', encoding='utf-8') as stream:
+            lines = stream.readlines()
+            stream.seek(0)
+            stream.writelines(lines[:2])
+            offset = stream.tell()
+            stream.writelines(lines[2:4])
+            stream.write(lines[4][:10])
+            stream.truncate()
+        transfer.Checkpoint(path).save(last_id=pks[1], offset=offset)
+        self.export('posts.ndjson', resume=True)
+        with open(path, encoding='utf-8') as stream:
+            exported = [json.loads(line)['id'] for line in stream]
+        self.assertEqual(exported, pks)
+
+    def test_export_resumes_after_last_id(self):
+        """Прерванная выгрузка дописывает только оставшиеся посты."""
+        path = os.path.join(self.directory, 'posts.ndjson')
+        pks = list(Post.objects.order_by('pk').values_list('pk', flat=True))
+        with open(path, 'w', encoding='utf-8') as stream:
+            transfer.export_posts(stream, after=0, batch_size=100)
+        with open(path, 'r+', encoding='utf-8') as stream:
+            lines = stream.readlines()[:2]
+            stream.seek(0)
+            stream.writelines(lines)
+            stream.truncate()
+        transfer.Checkpoint(path).save(last_id=pks[1])
+        self.export('posts.ndjson', resume=True)
+        with open(path, encoding='utf-8') as stream:
+            exported = [json.loads(line)['id'] for line in stream]
+        self.assertEqual(exported, pks)
@@ -0,0 +1,92 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import comment_queue, trending
+from posts.models import Comment, Follow, Post, TrendingPost, User
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='trending_author')
+        cls.other = User.objects.create_user(username='trending_other')
+        cls.reader = User.objects.create_user(username='trending_reader')
+        cls.quiet = Post.objects.create(author=cls.author, text='Тихий')
+        cls.hot = Post.objects.create(author=cls.other, text='Горячий')
+        cls.warm = Post.objects.create(author=cls.other, text='Тёплый')
+
+    def setUp(self):
+        cache.clear()
+
+    def comment(self, post, count=1):
+        for number in range(count):
+            Comment.objects.create(
+                post=post, author=self.reader, text=f'Коммент {number}'
+            )
+
+    def ranking(self):
+        return list(
+            TrendingPost.objects.order_by('-score').values_list(
+                'post_id', flat=True
+            )
+        )
+
+    def test_comments_rank_posts(self):
+        """Больше комментариев — выше в рейтинге; без них поста нет."""
+        self.comment(self.hot, 3)
+        self.comment(self.warm)
+        self.assertEqual(self.ranking(), [self.hot.pk, self.warm.pk])
+
+    def test_follow_boosts_recent_posts_of_author(self):
+        """Подписка поднимает свежие посты автора."""
+        self.comment(self.hot)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.ranking()[0], self.quiet.pk)
+
+    def test_old_activity_decays(self):
+        """Старые комментарии весят меньше одного свежего."""
+        self.comment(self.hot, 3)
+        Comment.objects.update(created=timezone.now() - timedelta(days=2))
+        self.comment(self.warm)
+        call_command('rebuild_trending', stdout=StringIO())
+        self.assertEqual(self.ranking(), [self.warm.pk, self.hot.pk])
+
+    def test_rebuild_matches_incremental_scores(self):
+        """Пересчёт командой даёт те же очки, что и обновления на записи."""
+        self.comment(self.hot, 2)
+        self.comment(self.warm)
+        Follow.objects.create(user=self.reader, author=self.other)
+        incremental = dict(TrendingPost.objects.values_list('post', 'score'))
+        trending.rebuild()
+        rebuilt = dict(TrendingPost.objects.values_list('post', 'score'))
+        self.assertEqual(incremental.keys(), rebuilt.keys())
+        for post_id, score in incremental.items():
+            self.assertAlmostEqual(score, rebuilt[post_id], places=6)
+
+    def test_queued_comments_are_ranked(self):
+        """Пачка из очереди комментариев тоже попадает в рейтинг."""
+        comment = Comment(
+            post_id=self.warm.pk, author_id=self.reader.pk, text='Из очереди'
+        )
+        comment.pending_token = 'token'
+        comment_queue.flush([comment])
+        self.assertEqual(self.ranking(), [self.warm.pk])
+
+    def test_trending_page_is_indexed_read(self):
+        """Страница читает рейтинг одним запросом плюс картинки."""
+        self.comment(self.hot, 2)
+        self.comment(self.warm)
+        url = reverse('posts:trending')
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(
+            [post.pk for post in response.context['page_obj']],
+            [self.hot.pk, self.warm.pk],
+        )
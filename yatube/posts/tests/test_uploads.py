@@ -0,0 +1,130 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+ORIENTATION = 0x0112
+MAKE = 0x010F
+
+
+def jpeg_upload(name, size, exif=None):
+    buffer = BytesIO()
+    image = Image.new('RGB', size, 'blue')
+    options = {'exif': exif.tobytes()} if exif is not None else {}
+    image.save(buffer, 'JPEG', **options)
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/jpeg')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class UploadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='uploads_user')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def create(self, text, image):
+        return self.client.post(
+            reverse('posts:post_create'), {'text': text, 'image': image}
+        )
+
+    @override_settings(IMAGE_UPLOAD_MAX_BYTES=1024)
+    def test_oversized_file_is_rejected(self):
+        """Файл сверх лимита байтов отклоняется с понятной ошибкой."""
+        response = self.create('Большой', SimpleUploadedFile(
+            'big.jpg', b'\xff' * 4096, 'image/jpeg'
+        ))
+        self.assertFormError(
+            response, 'form', 'image', 'Файл больше 1,0\xa0КБ.'
+        )
+        self.assertFalse(Post.objects.filter(text='Большой').exists())
+
+    @override_settings(IMAGE_UPLOAD_MAX_PIXELS=100 * 100)
+    def test_too_many_pixels_is_rejected(self):
+        """Картинка с числом пикселей сверх лимита не принимается."""
+        response = self.create('Широкий', jpeg_upload('wide.jpg', (200, 60)))
+        self.assertFormError(
+            response, 'form', 'image',
+            'Слишком большая картинка: 200×60 пикселей.'
+        )
+
+    @override_settings(IMAGE_UPLOAD_MAX_DECODED_PIXELS=100 * 100)
+    def test_decoded_pixel_limit_applies_to_png(self):
+        """Для PNG действует более низкий предел, чем для JPEG."""
+        buffer = BytesIO()
+        Image.new('RGB', (200, 60), 'blue').save(buffer, 'PNG')
+        response = self.create('Плотный', SimpleUploadedFile(
+            'wide.png', buffer.getvalue(), 'image/png'
+        ))
+        self.assertFormError(
+            response, 'form', 'image',
+            'Слишком большая картинка: 200×60 пикселей.'
+        )
+        response = self.create('Плотный', jpeg_upload('wide.jpg', (200, 60)))
+        self.assertEqual(response.status_code, 302)
+
+    def test_exif_is_stripped_and_orientation_applied(self):
+        """EXIF удаляется, а поворот из него применяется к пикселям."""
+        exif = Image.Exif()
+        exif[ORIENTATION] = 6
+        exif[MAKE] = 'Камера'
+        self.create('Фото', jpeg_upload('photo.jpg', (40, 20), exif))
+        post = Post.objects.get(text='Фото')
+        with Image.open(post.image.path) as image:
+            self.assertEqual(dict(image.getexif()), {})
+            self.assertEqual(image.size, (20, 40))
+
+    def test_png_metadata_is_stripped(self):
+        """У PNG с прозрачностью тоже не остаётся EXIF и ICC-профиля."""
+        exif = Image.Exif()
+        exif[MAKE] = 'Камера'
+        buffer = BytesIO()
+        Image.new('RGBA', (40, 20), (0, 0, 255, 128)).save(
+            buffer, 'PNG', exif=exif.tobytes(), icc_profile=b'profile'
+        )
+        self.create('Прозрачное', SimpleUploadedFile(
+            'alpha.png', buffer.getvalue(), 'image/png'
+        ))
+        post = Post.objects.get(text='Прозрачное')
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.format, 'PNG')
+            self.assertNotIn('exif', image.info)
+            self.assertNotIn('icc_profile', image.info)
+            self.assertEqual(dict(image.getexif()), {})
+
+    @override_settings(IMAGE_MAX_DIMENSION=64)
+    def test_large_image_is_downscaled(self):
+        """Длинная сторона оригинала ограничена IMAGE_MAX_DIMENSION."""
+        self.create('Крупный', jpeg_upload('large.jpg', (640, 320)))
+        post = Post.objects.get(text='Крупный')
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.size, (64, 32))
+
+    def test_identical_uploads_share_one_file(self):
+        """Одинаковые картинки сохраняются одним файлом."""
+        for text in ('Первый', 'Второй'):
+            self.create(text, jpeg_upload(f'{text}.jpg', (30, 30)))
+        first, second = (
+            Post.objects.get(text=text).image for text in ('Первый', 'Второй')
+        )
+        self.assertEqual(first.name, second.name)
+        self.assertEqual(
+            os.listdir(os.path.dirname(first.path)),
+            [os.path.basename(first.name)],
+        )
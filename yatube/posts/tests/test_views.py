@@ -2,14 +2,20 @@ import shutil
 
 import tempfile
 
+from io import StringIO
+from unittest import mock
+
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.cache import cache
+from django.core.management import call_command
 
+from posts import cards, identity
 from posts.forms import PostForm
-from posts.models import Group, Post, User, Follow
+from posts.identity import LRU
+from posts.models import Comment, Group, Post, User, Follow, TimelineEntry
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
@@ -92,16 +98,45 @@ class PostViewsTests(TestCase):
     def test_cache_indx(self):
         """Проверка кэширования индекс."""
         post_cach = self.authorized_client.get(reverse('posts:index')).content
-        Post.objects.create(
-            text='Пост кэш',
-            author=self.user,
-        )
+        Post.objects.filter(pk=self.post.pk).update(text='Без сигнала')
         post_1 = self.authorized_client.get(reverse('posts:index')).content
         self.assertEqual(post_cach, post_1)
         cache.clear()
         post_2 = self.authorized_client.get(reverse('posts:index')).content
         self.assertNotEqual(post_cach, post_2)
 
+    def test_cache_index_invalidated_on_save(self):
+        """Новый пост сразу сбрасывает кэш индекса."""
+        post_cach = self.authorized_client.get(reverse('posts:index')).content
+        Post.objects.create(text='Пост кэш', author=self.user)
+        post_1 = self.authorized_client.get(reverse('posts:index')).content
+        self.assertNotEqual(post_cach, post_1)
+        self.assertIn('Пост кэш', post_1.decode())
+
+    def test_cache_index_invalidated_on_author_rename(self):
+        """Новое имя автора сразу видно на закэшированном индексе."""
+        author = User.objects.create_user(username='renamed_author')
+        Post.objects.create(text='Пост автора', author=author)
+        self.authorized_client.get(self.URL_INDEX)
+        author.first_name, author.last_name = 'Новое', 'Имя'
+        author.save(update_fields=('first_name', 'last_name'))
+        response = self.authorized_client.get(self.URL_INDEX)
+        self.assertIn('Новое Имя', response.content.decode())
+
+    def test_cache_index_varies_by_page_and_user(self):
+        """Кэш индекса различает страницы и пользователей."""
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Страница {number}')
+            for number in range(10)
+        )
+        first = self.authorized_client.get(self.URL_INDEX).content
+        second = self.authorized_client.get(
+            self.URL_INDEX, {'page': 2}
+        ).content
+        self.assertNotEqual(first, second)
+        guest = Client().get(self.URL_INDEX).content
+        self.assertNotIn('Пользователь:', guest.decode())
+
 
 class FollowViewsTest(TestCase):
     @classmethod
@@ -153,3 +188,308 @@ class FollowViewsTest(TestCase):
                         'username': self.author.username}))
         response = self.author_client.get(reverse('posts:follow_index'))
         self.assertEqual((len(page_object)), 0)
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост автора попадает в ленту подписчика."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        new_post = Post.objects.create(author=self.author, text='Новый')
+        response = self.follower_client.get(reverse('posts:follow_index'))
+        page_object = response.context['page_obj'].object_list
+        self.assertEqual(page_object[0].pk, new_post.pk)
+        self.assertEqual(len(page_object), 2)
+
+    def test_unfollow_clears_timeline(self):
+        """После отписки записи автора удаляются из ленты."""
+        follow = Follow.objects.create(user=self.follower, author=self.author)
+        self.assertTrue(self.follower.timeline.exists())
+        follow.delete()
+        self.assertFalse(self.follower.timeline.exists())
+
+    def test_backfill_timeline_command(self):
+        """Команда backfill_timeline восстанавливает ленту."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        TimelineEntry.objects.all().delete()
+        call_command('backfill_timeline', stdout=StringIO())
+        self.assertEqual(
+            list(self.follower.timeline.values_list('post_id', flat=True)),
+            [self.post.pk]
+        )
+
+
+class FeedQueriesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='queries_author', first_name='Имя', last_name='Фамилия'
+        )
+        cls.reader = User.objects.create_user(username='queries_reader')
+        cls.group = Group.objects.create(
+            title='Группа запросов',
+            slug='queries_group',
+            description='Описание',
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.author, group=cls.group, text=f'Пост {number}')
+            for number in range(15)
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.post = Post.objects.first()
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.reader, text=f'Коммент {n}')
+            for n in range(5)
+        )
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        cache.clear()
+
+    def test_feed_pages_run_fixed_number_of_queries(self):
+        """Число запросов на странице не зависит от числа постов."""
+        # Кроме index, на странице есть запрос отпечатка для ETag;
+        # на каждой — один запрос производных картинок. Группа и автор
+        # профиля при холодном кэше читаются отдельным запросом, а
+        # счётчики автора — ещё одним.
+        pages = (
+            (reverse('posts:index'), 4),
+            (reverse('posts:group_list', args=(self.group.slug,)), 6),
+            (reverse('posts:profile', args=(self.author.username,)), 8),
+            (reverse('posts:post_detail', args=(self.post.pk,)), 6),
+            (reverse('posts:follow_index'), 4),
+        )
+        for url, queries in pages:
+            with self.subTest(url=url):
+                with self.assertNumQueries(queries):
+                    self.reader_client.get(url)
+
+    def test_explain_feeds_uses_feed_indexes(self):
+        """explain_feeds печатает планы, в которых видны индексы лент."""
+        out = StringIO()
+        call_command(
+            'explain_feeds', group=self.group.slug,
+            user=self.author.username, stdout=out
+        )
+        output = out.getvalue()
+        for name in ('posts:index', 'posts:group_list', 'posts:profile',
+                     'posts:follow_index', 'posts:post_detail'):
+            with self.subTest(name=name):
+                self.assertIn(name, output)
+        self.assertIn('post_group_feed_idx', output)
+        self.assertIn('post_author_feed_idx', output)
+        self.assertIn('comment_post_keyset_idx', output)
+
+
+class ConditionalResponseTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='etag_author')
+        cls.reader = User.objects.create_user(username='etag_reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='etag_group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Пост'
+        )
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def assertNotModified(self, url, etag):
+        response = self.author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_unchanged_pages_return_304_without_rendering(self):
+        """Неизменная страница отдаёт 304, не рендеря шаблон."""
+        urls = (
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.author.username,)),
+            reverse('posts:post_detail', args=(self.post.pk,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                etag = self.author_client.get(url)['ETag']
+                with self.assertTemplateNotUsed('base.html'):
+                    self.assertNotModified(url, etag)
+
+    def test_edit_and_comment_change_post_etag(self):
+        """Правка и комментарий меняют ETag поста."""
+        url = reverse('posts:post_detail', args=(self.post.pk,))
+        etag = self.author_client.get(url)['ETag']
+        updated = self.post.updated
+        self.author_client.post(
+            reverse('posts:post_edit', args=(self.post.pk,)),
+            {'text': 'Исправленный пост'},
+        )
+        self.post.refresh_from_db()
+        self.assertGreater(self.post.updated, updated)
+        response = self.author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий'
+        )
+        response = self.author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_follow_changes_profile_etag(self):
+        """Новая подписка меняет ETag профиля, другой читатель — тоже."""
+        url = reverse('posts:profile', args=(self.author.username,))
+        etag = self.author_client.get(url)['ETag']
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = self.author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        reader_client = Client()
+        reader_client.force_login(self.reader)
+        response = reader_client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+class CardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='cards_author')
+        Post.objects.bulk_create(
+            Post(author=cls.author, text=f'Карточка {number}')
+            for number in range(3)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def posts(self):
+        return list(Post.objects.for_feed())
+
+    def test_cards_are_read_from_cache(self):
+        """Второй рендер берёт все карточки из кэша, не трогая шаблон."""
+        first = cards.render_cards(self.posts())
+        posts = self.posts()
+        with mock.patch.object(cards, 'render_card') as render:
+            self.assertEqual(cards.render_cards(posts), first)
+        render.assert_not_called()
+
+    def test_changed_post_rerenders_only_its_card(self):
+        """Правка поста меняет ключ только его карточки."""
+        cards.render_cards(self.posts())
+        post = Post.objects.first()
+        post.text = 'Исправленная карточка'
+        post.save()
+        with mock.patch.object(
+            cards, 'render_card', wraps=cards.render_card
+        ) as render:
+            html = cards.render_cards(self.posts())
+        render.assert_called_once()
+        self.assertIn('Исправленная карточка', html[0])
+
+    def test_feed_shows_renamed_author(self):
+        """Новое имя автора попадает в карточку без ручного сброса."""
+        cards.render_cards(self.posts())
+        self.author.first_name = 'Новое'
+        self.author.last_name = 'Имя'
+        self.author.save()
+        html = cards.render_cards(self.posts())
+        self.assertTrue(all('Новое Имя' in card for card in html))
+
+
+class GroupIndexTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='directory_author')
+        cls.groups = Group.objects.bulk_create(
+            Group(title=f'Группа {n}', slug=f'directory-{n}', description='')
+            for n in range(3)
+        )
+        call_command('recount', stdout=StringIO())
+        cls.group = Group.objects.get(slug='directory-0')
+        Post.objects.create(author=cls.author, group=cls.group, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_directory_lists_groups_with_counters(self):
+        """Каталог показывает все группы с числом постов."""
+        response = self.client.get(reverse('posts:group_index'))
+        groups = {group['slug']: group for group in response.context['groups']}
+        self.assertEqual(len(groups), 3)
+        self.assertEqual(groups['directory-0']['posts_count'], 1)
+        self.assertIsNotNone(groups['directory-0']['last_post'])
+        self.assertEqual(groups['directory-1']['posts_count'], 0)
+
+    def test_directory_is_cached_until_posts_change(self):
+        """Повторный запрос не ходит в базу, новый пост сбрасывает кэш."""
+        url = reverse('posts:group_index')
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+        Post.objects.create(author=self.author, group=self.group, text='Ещё')
+        response = self.client.get(url)
+        groups = {group['slug']: group for group in response.context['groups']}
+        self.assertEqual(groups['directory-0']['posts_count'], 2)
+
+
+class IdentityCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='identity_author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='identity-group', description='Описание'
+        )
+
+    def setUp(self):
+        cache.clear()
+        identity.groups.local.clear()
+        identity.users.local.clear()
+
+    def test_lookups_skip_database_when_warm(self):
+        """Повторный поиск группы и автора не ходит в базу."""
+        self.assertEqual(identity.groups.get('identity-group'), self.group)
+        self.assertEqual(identity.users.pk('identity_author'), self.author.pk)
+        with self.assertNumQueries(0):
+            group = identity.groups.get('identity-group')
+            identity.users.get('identity_author')
+        self.assertEqual(group.title, 'Группа')
+        identity.groups.local.clear()
+        with self.assertNumQueries(0):
+            identity.groups.get('identity-group')
+
+    def test_missing_names_are_cached(self):
+        """Несуществующий профиль отвечает 404 без запросов к базе."""
+        url = reverse('posts:profile', args=('nobody',))
+        self.assertEqual(self.client.get(url).status_code, 404)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).status_code, 404)
+        User.objects.create_user(username='nobody')
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_missing_on_replica_is_checked_on_primary(self):
+        """Промах на реплике перепроверяется на primary до кэширования."""
+        with mock.patch('posts.identity.router') as identity_router:
+            identity_router.db_for_read.return_value = 'replica'
+            with self.assertNumQueries(2):
+                self.assertIsNone(identity.users.pk('lagging'))
+        with self.assertNumQueries(1):
+            self.assertIsNone(identity.groups.pk('lagging'))
+
+    def test_rename_invalidates_both_names(self):
+        """После смены slug старый адрес даёт 404, новый — группу."""
+        identity.groups.get('identity-group')
+        self.group.slug = 'renamed-group'
+        self.group.save()
+        self.assertIsNone(identity.groups.get('identity-group'))
+        self.assertEqual(identity.groups.pk('renamed-group'), self.group.pk)
+
+    def test_lru_is_bounded(self):
+        """LRU вытесняет самые давние записи сверх своего размера."""
+        lru = LRU(2)
+        for key in 'abc':
+            lru.set(key, key, 60)
+        self.assertEqual(len(lru), 2)
+        self.assertIsNone(lru.get('a'))
+        self.assertEqual(lru.get('c'), 'c')
@@ -0,0 +1,62 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from sorl.thumbnail import get_thumbnail
+
+from .images import build_derivatives
+
+logger = logging.getLogger(__name__)
+
+# Должны совпадать с параметрами {% thumbnail %} в шаблонах постов.
+POST_THUMBNAILS = (
+    ('480x169', {'crop': 'center', 'upscale': True}),
+)
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            thread_name_prefix='thumbnails',
+        )
+    return _executor
+
+
+def render_thumbnails(image_name):
+    for geometry, options in POST_THUMBNAILS:
+        get_thumbnail(image_name, geometry, **options)
+
+
+def process_image(post_id, image_name):
+    if image_name:
+        render_thumbnails(image_name)
+    build_derivatives(post_id)
+
+
+def _render_in_worker(post_id, image_name):
+    try:
+        process_image(post_id, image_name)
+    except Exception:
+        logger.exception('Не удалось подготовить миниатюры %s', image_name)
+    finally:
+        close_old_connections()
+
+
+def schedule_thumbnails(post):
+    """Готовит миниатюры и производные картинки в фоне, чтобы ленты
+    их не ждали; у поста без картинки старые производные удаляются.
+    """
+    image_name = post.image.name if post.image else ''
+    if not settings.THUMBNAIL_WORKERS:
+        process_image(post.pk, image_name)
+        return
+    transaction.on_commit(
+        lambda: _get_executor().submit(
+            _render_in_worker, post.pk, image_name
+        )
+    )
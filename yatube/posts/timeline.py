@@ -0,0 +1,111 @@
+from django.db import connection, transaction
+
+from .cache import bump_generation, bump_timeline_version
+from .models import FEED_DEFERRED_FIELDS, Follow, Post, TimelineEntry
+
+BATCH_SIZE = 1000
+
+
+def _bulk_insert(entries):
+    TimelineEntry.objects.bulk_create(
+        entries, batch_size=BATCH_SIZE, ignore_conflicts=True
+    )
+
+
+def feed_for(user_id):
+    return TimelineEntry.objects.filter(user_id=user_id).select_related(
+        'post__author', 'post__group'
+    ).defer(
+        *(f'post__{field}' for field in FEED_DEFERRED_FIELDS)
+    ).prefetch_related('post__derivatives')
+
+
+def fan_out_post(post):
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    _bulk_insert(
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post.pk,
+            author_id=post.author_id,
+            pub_date=post.pub_date,
+        )
+        for user_id in followers.iterator()
+    )
+
+
+def fan_out_posts(posts):
+    """Раскладывает посты, вставленные bulk_create, по лентам подписчиков."""
+    posts_sql, params = posts.values('pk').query.sql_with_params()
+    ops = connection.ops
+    sql = (
+        f'{ops.insert_statement(ignore_conflicts=True)} '
+        f'{TimelineEntry._meta.db_table} '
+        '(user_id, post_id, author_id, pub_date) '
+        'SELECT f.user_id, p.id, p.author_id, p.pub_date '
+        f'FROM {Follow._meta.db_table} f '
+        f'JOIN {Post._meta.db_table} p ON p.author_id = f.author_id '
+        f'WHERE p.id IN ({posts_sql}) '
+        f'{ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def add_author(user_id, author_id):
+    posts = Post.objects.filter(
+        author_id=author_id
+    ).values_list('pk', 'pub_date')
+    _bulk_insert(
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post_id,
+            author_id=author_id,
+            pub_date=pub_date,
+        )
+        for post_id, pub_date in posts.iterator()
+    )
+    bump_timeline_version(user_id)
+
+
+def remove_author(user_id, author_id):
+    TimelineEntry.objects.filter(
+        user_id=user_id, author_id=author_id
+    ).delete()
+    bump_timeline_version(user_id)
+
+
+def head(user_id):
+    """Дата самой новой записи ленты: одно чтение по индексу ленты."""
+    return TimelineEntry.objects.filter(user_id=user_id).order_by(
+        '-pub_date', '-post'
+    ).values_list('pub_date', flat=True).first()
+
+
+def rebuild(user_ids=None):
+    """Пересобирает ленты одним INSERT ... SELECT без загрузки в Python."""
+    entries = TimelineEntry.objects.all()
+    follows = Follow.objects.all()
+    if user_ids is not None:
+        entries = entries.filter(user_id__in=user_ids)
+        follows = follows.filter(user_id__in=user_ids)
+    follows_sql, params = follows.values('pk').query.sql_with_params()
+    sql = (
+        f'INSERT INTO {TimelineEntry._meta.db_table} '
+        '(user_id, post_id, author_id, pub_date) '
+        'SELECT f.user_id, p.id, p.author_id, p.pub_date '
+        f'FROM {Follow._meta.db_table} f '
+        f'JOIN {Post._meta.db_table} p ON p.author_id = f.author_id '
+        f'WHERE f.id IN ({follows_sql})'
+    )
+    with transaction.atomic():
+        entries.delete()
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+    # Новые посты меняют поколение лент сами, а пересборка — нет.
+    if user_ids is None:
+        bump_generation()
+    else:
+        for user_id in user_ids:
+            bump_timeline_version(user_id)
@@ -0,0 +1,357 @@
+import csv
+import json
+import os
+import time
+from contextlib import contextmanager
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import counters, search, timeline
+from .cache import bump_generation
+from .models import Group, Post, User
+
+BATCH_SIZE = 1000
+CSV = 'csv'
+NDJSON = 'ndjson'
+FORMATS = (CSV, NDJSON)
+FIELDS = ('id', 'text', 'pub_date', 'author', 'group', 'image')
+
+
+def detect_format(path, fmt=None):
+    if fmt:
+        return fmt
+    return CSV if str(path).lower().endswith('.csv') else NDJSON
+
+
+class Checkpoint:
+    """Состояние прерванного импорта или экспорта в JSON-файле рядом
+    с данными; запись через os.replace, чтобы не оставить половину файла.
+    """
+
+    def __init__(self, path):
+        self.path = f'{path}.checkpoint'
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as stream:
+                return json.load(stream)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def save(self, **state):
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as stream:
+            json.dump(state, stream)
+        os.replace(temporary, self.path)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class Progress:
+    def __init__(self, log):
+        self.log = log or (lambda message: None)
+        self.started = time.monotonic()
+
+    def report(self, rows, **counts):
+        elapsed = time.monotonic() - self.started or 1e-9
+        details = ''.join(
+            f', {name}: {value}' for name, value in counts.items()
+        )
+        self.log(f'Строк: {rows}{details}, {rows / elapsed:.0f} строк/с')
+
+
+def _export_rows(after, batch_size):
+    posts = Post.objects.filter(pk__gt=after).order_by('pk').values_list(
+        'pk', 'text', 'pub_date', 'author__username', 'group__slug', 'image'
+    )
+    for pk, text, pub_date, author, group, image in posts.iterator(
+        chunk_size=batch_size
+    ):
+        yield {
+            'id': pk,
+            'text': text,
+            'pub_date': pub_date.isoformat(),
+            'author': author,
+            'group': group or '',
+            'image': image or '',
+        }
+
+
+def export_posts(stream, fmt=NDJSON, after=0, batch_size=BATCH_SIZE,
+                 checkpoint=None, log=None):
+    """Пишет посты с id больше ``after`` в текстовый поток.
+
+    Строки читаются курсором пачками по ``batch_size``, поэтому память
+    не зависит от размера таблицы. После каждой пачки поток сбрасывается
+    на диск, а в ``checkpoint`` записываются последний выгруженный id и
+    смещение конца файла: при возобновлении хвост после него обрезается.
+    """
+    progress = Progress(log)
+    writer = None
+    if fmt == CSV:
+        writer = csv.DictWriter(stream, FIELDS)
+        if not after:
+            writer.writeheader()
+    rows = 0
+    for row in _export_rows(after, batch_size):
+        if writer:
+            writer.writerow(row)
+        else:
+            stream.write(json.dumps(row, ensure_ascii=False) + '\n')
+        rows += 1
+        if rows % batch_size == 0:
+            stream.flush()
+            if checkpoint:
+                checkpoint.save(last_id=row['id'], offset=stream.tell())
+            progress.report(rows)
+    stream.flush()
+    if checkpoint:
+        checkpoint.clear()
+    progress.report(rows)
+    return rows
+
+
+def read_records(stream, fmt=NDJSON, offset=0):
+    """Записи из бинарного потока вместе с байтовым смещением их конца.
+
+    Смещение считается по прочитанным строкам, а не через tell(): так
+    его можно сохранить в контрольной точке и продолжить с него через
+    seek() даже для CSV с многострочными полями.
+    """
+    position = offset
+
+    def lines():
+        nonlocal position
+        for line in stream:
+            position += len(line)
+            yield line.decode('utf-8')
+
+    if fmt == CSV:
+        header = next(csv.reader([stream.readline().decode('utf-8-sig')]))
+        if offset:
+            stream.seek(offset)
+        else:
+            position = stream.tell()
+        for row in csv.DictReader(lines(), fieldnames=header):
+            yield row, position
+        return
+    if offset:
+        stream.seek(offset)
+    for line in lines():
+        if line.strip():
+            yield json.loads(line), position
+
+
+@contextmanager
+def keep_pub_date():
+    """Отключает auto_now_add, чтобы сохранить исходные даты постов."""
+    field = Post._meta.get_field('pub_date')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def _parse_date(value):
+    if not value:
+        return timezone.now()
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(value)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, timezone.utc)
+    return parsed
+
+
+class PostImporter:
+    """Собирает посты из записей выгрузки и вставляет их пачками.
+
+    Авторы и группы ищутся по username и slug через словари в памяти,
+    которые дополняются одним запросом на пачку только для новых ключей;
+    не найденные ключи тоже запоминаются, чтобы не искать их повторно.
+    """
+
+    def __init__(self, keep_ids=False, create_missing=False,
+                 image_map=()):
+        self.keep_ids = keep_ids
+        self.create_missing = create_missing
+        self.image_map = tuple(image_map)
+        self.users = {}
+        self.groups = {}
+        self.skipped = {}
+
+    def _create(self, model, keys):
+        if model is User:
+            rows = (User(username=key) for key in keys)
+        else:
+            rows = (Group(slug=key, title=key) for key in keys)
+        model.objects.bulk_create(rows, ignore_conflicts=True)
+
+    def _resolve(self, model, field, known, keys):
+        missing = {key for key in keys if key and key not in known}
+        if not missing:
+            return
+        found = dict(model.objects.filter(
+            **{f'{field}__in': missing}
+        ).values_list(field, 'pk'))
+        if self.create_missing and len(found) < len(missing):
+            self._create(model, missing - set(found))
+            found = dict(model.objects.filter(
+                **{f'{field}__in': missing}
+            ).values_list(field, 'pk'))
+        known.update(dict.fromkeys(missing))
+        known.update(found)
+
+    def map_image(self, path):
+        for old, new in self.image_map:
+            if path.startswith(old):
+                return new + path[len(old):]
+        return path
+
+    def _skip(self, reason):
+        self.skipped[reason] = self.skipped.get(reason, 0) + 1
+
+    def build(self, record):
+        text = record.get('text') or ''
+        if not text.strip():
+            return self._skip('text')
+        author_id = self.users.get(record.get('author'))
+        if author_id is None:
+            return self._skip('author')
+        slug = record.get('group') or ''
+        group_id = self.groups.get(slug) if slug else None
+        if slug and group_id is None:
+            return self._skip('group')
+        try:
+            pub_date = _parse_date(record.get('pub_date'))
+        except ValueError:
+            return self._skip('pub_date')
+        post = Post(
+            text=text,
+            pub_date=pub_date,
+            author_id=author_id,
+            group_id=group_id,
+            image=self.map_image(record.get('image') or ''),
+        )
+        if self.keep_ids and record.get('id'):
+            post.pk = int(record['id'])
+        return post
+
+    def import_batch(self, records):
+        self._resolve(
+            User, 'username', self.users,
+            {record.get('author') for record in records}
+        )
+        self._resolve(
+            Group, 'slug', self.groups,
+            {record.get('group') for record in records}
+        )
+        posts = [
+            post for post in map(self.build, records) if post is not None
+        ]
+        # bulk_create на SQLite не возвращает id: новые посты — те, что
+        # выше прежнего максимума, и явные id, которых ещё не было.
+        explicit = {post.pk for post in posts if post.pk}
+        if explicit:
+            explicit -= set(Post.objects.filter(
+                pk__in=explicit
+            ).values_list('pk', flat=True))
+        last = Post.objects.aggregate(last=Max('pk'))['last'] or 0
+        with keep_pub_date():
+            Post.objects.bulk_create(posts, ignore_conflicts=self.keep_ids)
+        return explicit | set(Post.objects.filter(
+            pk__gt=last
+        ).values_list('pk', flat=True))
+
+
+def _reset_sequences():
+    sql = connection.ops.sequence_reset_sql(no_style(), [Post])
+    with connection.cursor() as cursor:
+        for statement in sql:
+            cursor.execute(statement)
+
+
+def update_derived(post_ids, index_search=True):
+    """bulk_create не шлёт сигналы: ленты, счётчики и индекс — для пачки."""
+    posts = Post.objects.filter(pk__in=post_ids)
+    timeline.fan_out_posts(posts)
+    counters.add_posts(posts)
+    if index_search:
+        search.index_posts(posts)
+
+
+def rebuild_derived(index_search=True, log=None):
+    """Пересобирает ленты, счётчики и индекс целиком."""
+    log = log or (lambda message: None)
+    log('Пересборка лент подписок')
+    timeline.rebuild()
+    log('Пересчёт счётчиков')
+    counters.recount()
+    if index_search:
+        log('Пересборка поискового индекса')
+        search.rebuild()
+    bump_generation()
+
+
+def import_posts(stream, fmt=NDJSON, importer=None, batch_size=BATCH_SIZE,
+                 checkpoint=None, log=None, derived=True, index_search=True):
+    """Читает записи из бинарного потока и вставляет посты пачками.
+
+    Каждая пачка — отдельная транзакция; после её фиксации в
+    ``checkpoint`` сохраняется смещение в файле, и повторный запуск
+    продолжает с него. Если процесс упал между фиксацией и записью
+    точки, последняя пачка загрузится ещё раз; с ``keep_ids`` такие
+    строки отбрасываются как конфликты.
+
+    С ``derived`` ленты, счётчики и поисковый индекс дополняются в той же
+    транзакции, что и пачка; без него их пересобирает ``rebuild_derived``.
+    """
+    importer = importer or PostImporter()
+    state = checkpoint.load() if checkpoint else {}
+    rows = state.get('rows', 0)
+    created = state.get('created', 0)
+    importer.skipped.update(state.get('skipped', {}))
+    progress = Progress(log)
+    batch = []
+
+    def flush(offset):
+        nonlocal created
+        with transaction.atomic():
+            post_ids = importer.import_batch(batch)
+            if derived and post_ids:
+                update_derived(post_ids, index_search)
+        created += len(post_ids)
+        batch.clear()
+        if checkpoint:
+            checkpoint.save(
+                offset=offset, rows=rows, created=created,
+                skipped=importer.skipped,
+            )
+        progress.report(
+            rows, created=created, skipped=sum(importer.skipped.values())
+        )
+
+    offset = state.get('offset', 0)
+    for record, offset in read_records(stream, fmt, offset):
+        batch.append(record)
+        rows += 1
+        if len(batch) == batch_size:
+            flush(offset)
+    if batch:
+        flush(offset)
+    if importer.keep_ids:
+        _reset_sequences()
+    if derived:
+        bump_generation()
+    if checkpoint:
+        checkpoint.clear()
+    return {'rows': rows, 'created': created, 'skipped': importer.skipped}
@@ -0,0 +1,120 @@
+import math
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (
+    FEED_DEFERRED_FIELDS, Comment, Follow, Post, TrendingPost
+)
+
+# Вклад события падает вдвое за HALF_LIFE. Хранится log2 суммы вкладов,
+# приведённых к EPOCH: порядок по нему совпадает с порядком по
+# затуханию «на сейчас», поэтому строки не приходится переписывать
+# с течением времени, а новое событие меняет только свою строку.
+EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+HALF_LIFE = timedelta(hours=12)
+# Подписка на автора поднимает его посты не старше WINDOW.
+WINDOW = timedelta(days=7)
+COMMENT_WEIGHT = 1
+FOLLOW_WEIGHT = 3
+
+
+def log_weight(weight, moment):
+    return math.log2(weight) + (moment - EPOCH) / HALF_LIFE
+
+
+def log_add(first, second):
+    """log2(2**first + 2**second) без переполнения."""
+    if first is None:
+        return second
+    high, low = max(first, second), min(first, second)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+def _add_to(scores, post_id, value):
+    scores[post_id] = log_add(scores.get(post_id), value)
+
+
+def add_activity(scores):
+    """Прибавляет вклады ``{post_id: log2 вклада}`` к рейтингу."""
+    if not scores:
+        return
+    with transaction.atomic():
+        rows = {
+            row.post_id: row
+            for row in TrendingPost.objects.select_for_update().filter(
+                post_id__in=scores
+            )
+        }
+        for post_id, row in rows.items():
+            row.score = log_add(row.score, scores[post_id])
+        TrendingPost.objects.bulk_update(rows.values(), ('score',))
+        TrendingPost.objects.bulk_create(
+            (TrendingPost(post_id=post_id, score=value)
+             for post_id, value in scores.items() if post_id not in rows),
+            ignore_conflicts=True,
+        )
+
+
+def record_comments(comments):
+    scores = {}
+    for comment in comments:
+        _add_to(scores, comment.post_id, log_weight(
+            COMMENT_WEIGHT, comment.created or timezone.now()
+        ))
+    add_activity(scores)
+
+
+def _boosted_posts(author_id, moment):
+    return Post.objects.filter(
+        author_id=author_id, pub_date__gte=moment - WINDOW
+    ).values_list('pk', flat=True)
+
+
+def record_follow(follow):
+    moment = follow.created or timezone.now()
+    value = log_weight(FOLLOW_WEIGHT, moment)
+    add_activity({
+        post_id: value
+        for post_id in _boosted_posts(follow.author_id, moment)
+    })
+
+
+def rebuild(now=None):
+    """Пересчитывает рейтинг по событиям за WINDOW и убирает остальное.
+
+    Исправляет то, что не видят сигналы: удалённые комментарии,
+    отписки, вставки через bulk_create.
+    """
+    since = (now or timezone.now()) - WINDOW
+    scores = {}
+    comments = Comment.objects.filter(
+        created__gte=since, post__isnull=False
+    ).values_list('post_id', 'created')
+    for post_id, created in comments.iterator():
+        _add_to(scores, post_id, log_weight(COMMENT_WEIGHT, created))
+    follows = Follow.objects.filter(created__gte=since).values_list(
+        'author_id', 'created'
+    )
+    for author_id, created in follows.iterator():
+        value = log_weight(FOLLOW_WEIGHT, created)
+        for post_id in _boosted_posts(author_id, created):
+            _add_to(scores, post_id, value)
+    with transaction.atomic():
+        TrendingPost.objects.all().delete()
+        TrendingPost.objects.bulk_create(
+            (TrendingPost(post_id=post_id, score=value)
+             for post_id, value in scores.items()),
+            batch_size=1000,
+        )
+    return len(scores)
+
+
+def feed():
+    """Посты по убыванию рейтинга: один проход по trending_score_idx."""
+    return TrendingPost.objects.select_related(
+        'post__author', 'post__group'
+    ).defer(
+        *(f'post__{field}' for field in FEED_DEFERRED_FIELDS)
+    ).prefetch_related('post__derivatives')
@@ -0,0 +1,98 @@
+import hashlib
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from PIL import Image, ImageOps
+
+from .models import Post
+
+UPLOAD_DIR = 'posts/'
+# Перекодированная картинка держится в памяти до этого размера,
+# дальше уходит во временный файл.
+SPOOL_SIZE = 2 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+
+class LimitedUploadHandler(TemporaryFileUploadHandler):
+    """Пишет загрузку во временный файл, по пути считая байты и sha256.
+
+    Всё сверх IMAGE_UPLOAD_MAX_BYTES не сохраняется: запрос дочитывается,
+    но файл помечается ``oversized``, и форма отклоняет его, не пытаясь
+    разобрать обрезанную картинку.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.digest = hashlib.sha256()
+        self.oversized = False
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.IMAGE_UPLOAD_MAX_BYTES:
+            self.oversized = True
+            return None
+        self.digest.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        upload = super().file_complete(file_size)
+        upload.oversized = self.oversized
+        upload.sha256 = None if self.oversized else self.digest.hexdigest()
+        return upload
+
+
+def content_hash(upload):
+    digest = getattr(upload, 'sha256', None)
+    if digest:
+        return digest
+    digest = hashlib.sha256()
+    for chunk in upload.chunks(CHUNK_SIZE):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _has_alpha(image):
+    return image.mode in ('RGBA', 'LA') or 'transparency' in image.info
+
+
+def _reencode(image, stream, extension):
+    limit = settings.IMAGE_MAX_DIMENSION
+    # JPEG сразу декодируется в уменьшенном масштабе; остальные форматы
+    # декодируются целиком, и память ограничивает их отдельный, более
+    # низкий предел пикселей в форме.
+    image.draft('RGB', (limit, limit))
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((limit, limit), Image.LANCZOS)
+    image = image.convert('RGBA' if extension == 'png' else 'RGB')
+    # convert(), exif_transpose() и thumbnail() сохраняют info, а PNG
+    # берёт из него exif и icc_profile: очищаем, чтобы остались пиксели.
+    image.info.clear()
+    if extension == 'png':
+        image.save(stream, 'PNG', optimize=True)
+    else:
+        image.save(
+            stream, 'JPEG', quality=85, optimize=True, progressive=True
+        )
+
+
+def store_image(upload):
+    """Сохраняет перекодированную картинку под именем из хеша содержимого.
+
+    Одинаковые загрузки получают один файл: если он уже есть в хранилище,
+    картинка даже не декодируется.
+    """
+    digest = content_hash(upload)
+    storage = Post.image.field.storage
+    upload.seek(0)
+    with Image.open(upload) as image:
+        extension = 'png' if _has_alpha(image) else 'jpg'
+        name = f'{UPLOAD_DIR}{digest[:2]}/{digest}.{extension}'
+        if storage.exists(name):
+            return name
+        with SpooledTemporaryFile(max_size=SPOOL_SIZE) as stream:
+            _reencode(image, stream, extension)
+            stream.seek(0)
+            return storage.save(name, File(stream, name=name))
@@ -1,19 +1,30 @@
 from django.shortcuts import render, get_object_or_404
-from django.core.paginator import Paginator
 from django.contrib.auth.decorators import login_required
+from django.db.models import OuterRef, Subquery
+from django.http import Http404
 from django.shortcuts import redirect
-from django.views.decorators.cache import cache_page
 
+from yatube.routers import use_replica
+
+from .cache import feed_cache
+from .conditional import conditional, latest
+from . import comment_queue
+from . import counters
+from . import identity
+from . import search as post_search
+from . import timeline
+from . import trending
 from .forms import PostForm, CommentForm
-from .models import Post, Group, User, Follow
+from .models import Comment, Post, User, Follow
+from .paginators import COMMENTS_PER_PAGE, paginate
+from .thumbnails import schedule_thumbnails
 
 
-@cache_page(20, key_prefix='index_page')
+@feed_cache
+@use_replica
 def index(request):
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    post_list = Post.objects.for_feed()
+    page_obj = paginate(request, post_list)
     context = {
         'page_obj': page_obj,
     }
@@ -21,12 +32,68 @@ def index(request):
     return render(request, 'posts/index.html', context)
 
 
+def _feed_head(posts):
+    # updated не меньше pub_date: его хватает для Last-Modified головы.
+    return posts.order_by('-pub_date', '-id').values('updated')[:1]
+
+
+def _group_state(request, slug):
+    group_id = identity.groups.pk(slug)
+    if group_id is None:
+        return None, request.user.pk
+    head = _feed_head(Post.objects.filter(group_id=group_id)).values_list(
+        'updated', flat=True
+    ).first()
+    return head, request.user.pk
+
+
+def _profile_state(request, username):
+    # Счётчики подписок меняются без правки постов, поэтому они тоже
+    # входят в отпечаток страницы.
+    author_id = identity.users.pk(username)
+    if author_id is None:
+        return None, request.user.pk, ()
+    state = User.objects.filter(pk=author_id).annotate(
+        head=Subquery(_feed_head(Post.objects.filter(author=OuterRef('pk'))))
+    ).values_list(
+        'head',
+        'counters__posts_count',
+        'counters__followers_count',
+        'counters__following_count',
+    ).first()
+    head, *counters = state or (None,)
+    return head, request.user.pk, counters
+
+
+def _post_state(request, post_id):
+    last_comment = Comment.objects.filter(post=OuterRef('pk')).order_by(
+        '-created'
+    ).values('created')[:1]
+    stamps = Post.objects.filter(pk=post_id).annotate(
+        last_comment=Subquery(last_comment)
+    ).values_list('pub_date', 'updated', 'last_comment').first()
+    return (
+        latest(*stamps or ()),
+        request.user.pk,
+        comment_queue.pending_count(post_id, request.user.pk),
+    )
+
+
+@use_replica
+def group_index(request):
+    context = {
+        'groups': counters.group_directory(),
+    }
+
+    return render(request, 'posts/groups.html', context)
+
+
+@use_replica
+@conditional(_group_state)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    post = group.posts.all()
-    paginator = Paginator(post, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    group = identity.groups.get_or_404(slug)
+    post = group.posts.for_feed()
+    page_obj = paginate(request, post)
     context = {
         'group': group,
         'post': post,
@@ -36,12 +103,12 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@use_replica
+@conditional(_profile_state)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    author_posts = author.posts.all()
-    paginator = Paginator(author_posts, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    author = identity.users.get_or_404(username)
+    author_posts = author.posts.for_feed()
+    page_obj = paginate(request, author_posts)
     following = None
     if request.user.is_authenticated:
         following = author.following.filter(user=request.user).exists()
@@ -54,19 +121,63 @@ def profile(request, username):
     return render(request, 'posts/profile.html', context)
 
 
+@use_replica
+@conditional(_post_state)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.for_feed().select_related('author__counters'),
+        pk=post_id
+    )
     form = CommentForm(request.POST or None)
-    comments = post.comments.all()
     context = {
         'post': post,
         "form": form,
-        "comments": comments,
+        **_comments_context(request, post.pk),
     }
 
     return render(request, 'posts/post_detail.html', context)
 
 
+def _comments_context(request, post_id):
+    comments = Comment.objects.filter(post_id=post_id).select_related(
+        'author'
+    ).only('text', 'created', 'post', 'author__username')
+    page_obj = paginate(
+        request, comments, COMMENTS_PER_PAGE,
+        key_field='created', pk_field='id', ascending=True,
+    )
+    comments = list(page_obj)
+    if page_obj.next_cursor is None:
+        comments += comment_queue.pending_for(post_id, request.user)
+    return {
+        'post_id': post_id,
+        'comments': comments,
+        'comments_page': page_obj,
+    }
+
+
+@use_replica
+@conditional(_post_state)
+def post_comments(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Http404
+    return render(
+        request, 'includes/comments.html', _comments_context(request, post_id)
+    )
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    posts = post_search.search(query, Post.objects.for_feed())
+    page_obj = paginate(request, posts, key_field='rank')
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+    }
+
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def post_create(request):
     user = request.user
@@ -79,6 +190,8 @@ def post_create(request):
         post = form.save(commit=False)
         post.author = user
         post.save()
+        if post.image:
+            schedule_thumbnails(post)
         return redirect('posts:profile', user.username)
 
     context = {
@@ -103,6 +216,8 @@ def post_edit(request, post_id):
 
     if request.method == "POST" and form.is_valid():
         form.save()
+        if 'image' in form.changed_data:
+            schedule_thumbnails(post)
         return redirect("posts:post_detail", post_id=post_id)
 
     context = {
@@ -116,34 +231,45 @@ def post_edit(request, post_id):
 
 @login_required
 def add_comment(request, post_id):
-    post = Post.objects.get(pk=post_id)
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Http404
     form = CommentForm(request.POST or None)
 
     if form.is_valid():
         comment = form.save(commit=False)
-        comment.author = request.user
-        comment.post = post
-        comment.save()
-        return redirect("posts:post_detail", post_id=post_id)
+        comment.author_id = request.user.pk
+        comment.post_id = post_id
+        comment_queue.enqueue(comment)
+
+    return redirect("posts:post_detail", post_id=post_id)
+
+
+@use_replica
+def trending_index(request):
+    entries = trending.feed()
+    page_obj = paginate(
+        request, entries, key_field='score', pk_field='post_id'
+    )
+    page_obj.object_list = [entry.post for entry in page_obj]
+
+    return render(request, 'posts/trending.html', {'page_obj': page_obj})
 
 
 @login_required
+@use_replica
 def follow_index(request):
-    posts = Post.objects.filter(
-        author__following__user=request.user
-    ).select_related('author', 'group')
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    entries = timeline.feed_for(request.user.pk)
+    page_obj = paginate(request, entries, pk_field='post_id')
+    page_obj.object_list = [entry.post for entry in page_obj]
 
     return render(request, 'posts/follow.html', {'page_obj': page_obj})
 
 
 @login_required
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = identity.users.get_or_404(username)
 
-    if author != request.user:
+    if author.pk != request.user.pk:
         Follow.objects.get_or_create(user=request.user, author=author)
 
     return redirect("posts:profile", username)
@@ -151,7 +277,8 @@ def profile_follow(request, username):
 
 @login_required
 def profile_unfollow(request, username):
+    author_id = identity.users.pk(username)
     get_object_or_404(Follow, user=request.user,
-                      author__username=username).delete()
+                      author_id=author_id).delete()
 
     return redirect("posts:profile", username)
@@ -0,0 +1,102 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+
+PRIMARY = 'default'
+PINNED_UNTIL_KEY = 'db_pinned_until'
+
+_state = threading.local()
+
+
+def _replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', ())
+
+
+@contextmanager
+def replica_reads():
+    previous = getattr(_state, 'replica', False)
+    pinned = getattr(_state, 'pinned', False)
+    _state.replica = True
+    try:
+        yield
+    finally:
+        _state.replica = previous
+        # Вне запроса закрепление за primary кончается вместе с блоком;
+        # в запросе его снимает ReplicaPinningMiddleware.
+        if not getattr(_state, 'in_request', False):
+            _state.pinned = pinned
+
+
+def use_replica(view):
+    """Отправляет чтения view на реплику, пока запрос ничего не записал."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with replica_reads():
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+def pin_to_primary():
+    # Запись вне запроса и вне replica_reads() никого не закрепляет:
+    # иначе команда или фоновый поток остались бы на primary навсегда.
+    if getattr(_state, 'replica', False) or getattr(
+        _state, 'in_request', False
+    ):
+        _state.pinned = True
+    _state.wrote = True
+
+
+class ReplicaRouter:
+    """Чтения лент — с реплик, записи и чтение после записи — с primary."""
+
+    def db_for_read(self, model, **hints):
+        replicas = _replicas()
+        if (not replicas or not getattr(_state, 'replica', False)
+                or getattr(_state, 'pinned', False)):
+            return PRIMARY
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label != 'sessions':
+            pin_to_primary()
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in _replicas():
+            return False
+        return None
+
+
+class ReplicaPinningMiddleware:
+    """Держит сессию на primary REPLICA_PIN_SECONDS после её записи."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        session = getattr(request, 'session', None)
+        pinned_until = session.get(PINNED_UNTIL_KEY, 0) if session else 0
+        _state.pinned = pinned_until > time.time()
+        _state.wrote = False
+        _state.in_request = True
+        try:
+            response = self.get_response(request)
+            if _state.wrote and session is not None:
+                session[PINNED_UNTIL_KEY] = (
+                    time.time() + settings.REPLICA_PIN_SECONDS
+                )
+            return response
+        finally:
+            _state.pinned = False
+            _state.wrote = False
+            _state.in_request = False
@@ -40,11 +40,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'yatube.routers.ReplicaPinningMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -54,7 +56,7 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backends.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -69,6 +71,9 @@ TEMPLATES = [
     },
 ]
 
+# Компилировать шаблоны при старте воркера (см. yatube/wsgi.py)
+WARM_TEMPLATES_ON_BOOT = False
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
 
@@ -82,6 +87,22 @@ DATABASES = {
     }
 }
 
+# Реплики для чтения лент; локально — второй файл SQLite, который
+# обновляет manage.py sync_replicas (с --lag — с имитацией отставания)
+DATABASE_REPLICAS = ()
+if os.environ.get('REPLICA_DB_PATH'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['REPLICA_DB_PATH'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS = ('replica',)
+
+DATABASE_ROUTERS = ['yatube.routers.ReplicaRouter']
+
+# Сколько секунд после записи сессия читает только с primary
+REPLICA_PIN_SECONDS = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -135,10 +156,63 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Общий для всех воркеров кэш в файле SQLite; при REDIS_URL — Redis
+# (нужен пакет django-redis, в requirements.txt его нет)
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache_backends.SQLiteCache',
+        'LOCATION': os.environ.get(
+            'CACHE_LOCATION', os.path.join(BASE_DIR, 'cache', 'cache.sqlite3')
+        ),
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
     }
 }
+if os.environ.get('REDIS_URL'):
+    CACHES['default'] = {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+    }
+
+# Тесты чистят кэш через cache.clear(): раннер подменяет его кэшем
+# в памяти, чтобы не трогать общий файл dev-сервера
+TEST_RUNNER = 'yatube.test_runner.IsolatedCacheRunner'
+
+# Ленты сбрасываются сигналами при изменении постов, групп и комментариев
+FEED_CACHE_TIMEOUT = 60 * 60 * 4
+# Карточки постов не сбрасываются: ключ меняется вместе с постом
+CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Кэш групп по slug и пользователей по имени: размер LRU процесса
+# и сроки жизни записей в нём, в общем кэше и для несуществующих
+IDENTITY_CACHE_SIZE = 1024
+IDENTITY_LOCAL_TIMEOUT = 5
+IDENTITY_CACHE_TIMEOUT = 60 * 60
+IDENTITY_MISSING_TIMEOUT = 60
+
+
+# Сколько последних замеров хранить для квантилей /metrics
+METRICS_WINDOW = 1024
+
+# Загрузки пишутся во временный файл с подсчётом байтов и sha256
+FILE_UPLOAD_HANDLERS = ['posts.uploads.LimitedUploadHandler']
+# Ограничения на картинки постов: байты файла и число пикселей
+IMAGE_UPLOAD_MAX_BYTES = 10 * 1024 * 1024
+IMAGE_UPLOAD_MAX_PIXELS = 40 * 1000 * 1000
+# PNG, GIF и прочие форматы без draft() декодируются целиком (4 байта
+# на пиксель в RGBA), поэтому для них предел ниже
+IMAGE_UPLOAD_MAX_DECODED_PIXELS = 12 * 1000 * 1000
+# Длинная сторона сохранённого оригинала после перекодирования
+IMAGE_MAX_DIMENSION = 2560
+
+# Потоки фоновой подготовки миниатюр и производных картинок;
+# 0 — готовить сразу в запросе
+THUMBNAIL_WORKERS = 2
+
+# Размер пачки фоновой записи комментариев; 0 — писать сразу в запросе
+COMMENT_QUEUE_BATCH = 0
+# Сколько секунд поток ждёт, пока пачка наберётся
+COMMENT_FLUSH_INTERVAL = 1.0
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
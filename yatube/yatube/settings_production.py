@@ -0,0 +1,86 @@
+# Профиль для боевого запуска:
+# DJANGO_SETTINGS_MODULE=yatube.settings_production
+from copy import deepcopy
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, SECRET_KEY, TEMPLATES, os
+
+DEBUG = os.environ.get('DEBUG', '') == '1'
+
+SECRET_KEY = os.environ.get('SECRET_KEY', SECRET_KEY)
+
+if os.environ.get('ALLOWED_HOSTS'):
+    ALLOWED_HOSTS = os.environ['ALLOWED_HOSTS'].split(',')
+
+# Шаблоны компилируются один раз на процесс и держатся в памяти,
+# даже если DEBUG включён для отладки на сервере
+TEMPLATES = deepcopy(TEMPLATES)
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+WARM_TEMPLATES_ON_BOOT = True
+
+# Постоянные соединения вместо нового на каждый запрос
+CONN_MAX_AGE = int(os.environ.get('CONN_MAX_AGE', 600))
+
+if os.environ.get('POSTGRES_DB'):
+    # Нужен psycopg2, в requirements.txt его нет
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ['POSTGRES_DB'],
+            'USER': os.environ.get('POSTGRES_USER', 'postgres'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get(
+                'SQLITE_PATH', os.path.join(BASE_DIR, 'db.sqlite3')
+            ),
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+            'OPTIONS': {
+                # Секунды ожидания блокировки на уровне драйвера
+                'timeout': 20,
+            },
+        }
+    }
+
+# DATABASES выше заменён целиком, поэтому реплика объявляется заново
+if os.environ.get('POSTGRES_DB') and os.environ.get('DB_REPLICA_HOST'):
+    DATABASES['replica'] = dict(
+        DATABASES['default'],
+        HOST=os.environ['DB_REPLICA_HOST'],
+        TEST={'MIRROR': 'default'},
+    )
+elif os.environ.get('REPLICA_DB_PATH'):
+    DATABASES['replica'] = dict(
+        DATABASES['default'],
+        NAME=os.environ['REPLICA_DB_PATH'],
+        TEST={'MIRROR': 'default'},
+    )
+DATABASE_REPLICAS = ('replica',) if 'replica' in DATABASES else ()
+
+# Применяются core.db к каждому новому соединению с SQLite
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+# Миниатюры и WebP/AVIF готовятся в фоне, а не в запросе загрузки
+THUMBNAIL_WORKERS = int(os.environ.get('THUMBNAIL_WORKERS', 2))
+
+# Комментарии пишутся фоновым потоком пачками, а не по строке на запрос
+COMMENT_QUEUE_BATCH = int(os.environ.get('COMMENT_QUEUE_BATCH', 200))
@@ -0,0 +1,24 @@
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+# Кэш тестов живёт в памяти процесса: cache.clear() в тестах не
+# задевает общий файл dev-сервера, а состояние не переживает прогон.
+TEST_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
+    },
+}
+
+
+class IsolatedCacheRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._isolated_cache = override_settings(CACHES=TEST_CACHES)
+        self._isolated_cache.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._isolated_cache.disable()
+        super().teardown_test_environment(**kwargs)